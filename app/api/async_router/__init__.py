@@ -0,0 +1,10 @@
+# Async (AsyncSession) versions of the read-heavy routes. Mounted ahead of the
+# sync router when ASYNC_DATABASE_URL is set, so these GETs shadow their sync
+# twins while every write keeps going through app.api.router.
+from fastapi import APIRouter
+from . import users, projects, tasks, comments
+router = APIRouter()
+router.include_router(users.router, prefix='/users', tags=['users'])
+router.include_router(projects.router, prefix='/projects', tags=['projects'])
+router.include_router(tasks.router, prefix='/tasks', tags=['tasks'])
+router.include_router(comments.router, prefix='/comments', tags=['comments'])
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.db import models, schemas
+from app.db.database import get_async_db
+from app.deps import get_current_user_async
+from app.api.conditional import etag_matches, make_etag, not_modified
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, poll_page
+from typing import Optional
+
+router = APIRouter()
+
+@router.get('/task/{task_id}', response_model=schemas.CommentPage)
+async def list_comments(
+    task_id: int,
+    response: Response,
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    state = (await db.execute(
+        select(models.Task.id, func.count(models.Comment.id), func.max(models.Comment.id))
+        .outerjoin(models.Comment, models.Comment.task_id == models.Task.id)
+        .where(models.Task.id == task_id)
+        .group_by(models.Task.id)
+    )).first()
+    if not state:
+        raise HTTPException(404, 'Task not found')
+
+    etag = make_etag(task_id, state[1], state[2], since, limit, weak=True)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    stmt = (
+        select(models.Comment)
+        .options(joinedload(models.Comment.author))
+        .where(models.Comment.task_id == task_id)
+    )
+    rows = (await db.execute(keyset_page(stmt, models.Comment, since, limit))).scalars().all()
+    items, next_cursor, has_more = poll_page(rows, limit, since)
+    response.headers['ETag'] = etag
+    return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.db import models, schemas
+from app.db.access import project_access_clause
+from app.db.archive import ACTIVE_PROJECT
+from app.db.database import get_async_db
+from app.deps import get_current_user_async
+from app.security.roles import Permission, can
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
+from app.api.conditional import etag_matches, make_etag, not_modified
+from typing import Optional
+
+router = APIRouter()
+
+
+# ---------------------------
+# LIST ALL PROJECTS
+# ---------------------------
+@router.get('/', response_model=schemas.ProjectPage)
+async def list_projects(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_archived: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    # Lazy loads are not allowed on AsyncSession, so member_ids must be preloaded
+    stmt = select(models.Project).options(
+        selectinload(models.Project.members).load_only(models.User.id)
+    )
+    if not include_archived:
+        stmt = stmt.where(ACTIVE_PROJECT)
+    rows = (await db.execute(keyset_page(stmt, models.Project, cursor, limit))).scalars().all()
+    items, next_cursor = split_page(rows, limit)
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+# ---------------------------
+# GET SINGLE PROJECT
+# ---------------------------
+@router.get('/{project_id:int}', response_model=schemas.ProjectDetail)
+async def get_project(
+    project_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    columns = [models.Project.version]
+    if not can(current_user, Permission.view_all_projects):
+        # Restrict if user not member or assignee
+        columns.append(project_access_clause(project_id, current_user.id))
+    head = (await db.execute(select(*columns).where(models.Project.id == project_id))).first()
+    if not head:
+        raise HTTPException(status_code=404, detail='Project not found')
+    if len(head) > 1 and not head[1]:
+        raise HTTPException(status_code=403, detail='Not permitted')
+
+    etag = make_etag('project', project_id, head[0])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    result = await db.execute(
+        select(models.Project)
+        .options(
+            selectinload(models.Project.members).joinedload(models.User.role),
+            selectinload(models.Project.tasks),
+            selectinload(models.Project.archived_tasks),
+        )
+        .where(models.Project.id == project_id)
+    )
+    project = result.scalars().first()
+    if not project:
+        raise HTTPException(status_code=404, detail='Project not found')
+    response.headers['ETag'] = make_etag('project', project.id, project.version)
+    return project
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import models, schemas
+from app.db.archive import ACTIVE_PROJECT
+from app.db.database import get_async_db
+from app.deps import get_current_user_async
+from app.security.roles import Permission, can
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
+from app.api.conditional import etag_matches, make_etag, not_modified
+from datetime import datetime
+from typing import Optional
+
+router = APIRouter()
+
+
+# `:int` keeps /tasks/overdue and friends falling through to the sync router
+@router.get('/{task_id:int}', response_model=schemas.TaskOut)
+async def get_task(
+    task_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    task = await db.get(models.Task, task_id)
+    if not task:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    if not can(current_user, Permission.view_all_tasks) and task.assignee_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
+    etag = make_etag('task', task.id, task.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers['ETag'] = etag
+    return task
+
+
+@router.get('/', response_model=schemas.TaskPage)
+async def list_tasks(
+    project_id: Optional[int] = None,
+    status_filter: Optional[models.TaskStatus] = Query(None, alias='status'),
+    assignee_id: Optional[int] = None,
+    due_before: Optional[datetime] = None,
+    due_after: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    stmt = select(models.Task).join(models.Project, models.Project.id == models.Task.project_id).where(ACTIVE_PROJECT)
+    if project_id:
+        stmt = stmt.where(models.Task.project_id == project_id)
+    if status_filter:
+        stmt = stmt.where(models.Task.status == status_filter)
+    if assignee_id:
+        stmt = stmt.where(models.Task.assignee_id == assignee_id)
+    if due_before:
+        stmt = stmt.where(models.Task.due_date < due_before)
+    if due_after:
+        stmt = stmt.where(models.Task.due_date >= due_after)
+
+    if not can(current_user, Permission.view_all_tasks):
+        stmt = stmt.where(models.Task.assignee_id == current_user.id)
+
+    rows = (await db.execute(keyset_page(stmt, models.Task, cursor, limit))).scalars().all()
+    items, next_cursor = split_page(rows, limit)
+    return {'items': items, 'next_cursor': next_cursor}
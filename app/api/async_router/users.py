@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Depends
+from app.db import models, schemas
+from app.deps import get_current_user_async
+
+router = APIRouter()
+
+@router.get('/me', response_model=schemas.UserOut)
+async def read_own_profile(current_user:models.User=Depends(get_current_user_async)):
+    return current_user
@@ -0,0 +1,48 @@
+import hashlib
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    """Quoted entity tag derived from the values that determine a representation."""
+    digest = hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:20]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (RFC 9110 13.1.2)."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(',')}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+def has_precondition(header: Optional[str]) -> bool:
+    """True when an If-Match header pins a version (anything but absent or `*`)."""
+    return bool(header) and header.strip() != '*'
+
+
+def precondition_failed(header: Optional[str], etag: str) -> bool:
+    """True when an If-Match header is present and does not strongly match etag."""
+    if not has_precondition(header):
+        return False
+    tags = {tag.strip() for tag in header.split(',')}
+    return etag.startswith('W/') or etag not in tags
+
+
+def precondition_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail='Resource has been modified; refetch and retry'
+    )
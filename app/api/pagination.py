@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, or_, select
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """Build an opaque cursor pointing at the last row of a page."""
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+
+
+def keyset_page(query, model, cursor: Optional[str], limit: int):
+    """
+    Restrict `query` to the page after `cursor`, ordered by (created_at, id).
+
+    The boundary row's created_at is re-read by primary key so the comparison
+    uses the value exactly as stored; the encoded timestamp is only a fallback
+    for when that row has been deleted in the meantime.
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        boundary = func.coalesce(
+            select(model.created_at).where(model.id == last_id).scalar_subquery(),
+            created_at,
+        )
+        # The leading `>=` gives the planner an index range to seek into; the
+        # OR alone makes SQLite and MySQL walk the index from the start.
+        query = query.filter(
+            model.created_at >= boundary,
+            or_(model.created_at > boundary, model.id > last_id),
+        )
+    # Fetch one extra row to know whether another page exists
+    return query.order_by(model.created_at, model.id).limit(limit + 1)
+
+
+def poll_page(rows: List, limit: int, cursor: Optional[str]):
+    """
+    Return (items, next_cursor, has_more) for polling clients: next_cursor
+    always points after the newest row seen, so it can be passed back as-is
+    even when the page came back empty.
+    """
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if items else cursor
+    return items, next_cursor, len(rows) > limit
+
+
+def split_page(rows: List, limit: int):
+    """Return (items, next_cursor) for rows fetched by keyset_page."""
+    if len(rows) <= limit:
+        return rows, None
+    items = rows[:limit]
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id)
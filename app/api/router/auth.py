@@ -1,28 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.db import models, schemas
 from app.db.database import get_db
-from app.db.models import User, Role
-from passlib.context import CryptContext
-from app.security.jwt import create_access_token
-from app.db.schemas import UserCreate, Token, UserOut, UserLogin  # make sure Token schema exists
+from app.db.models import User
+from app.security.jwt import RevocationListFull, create_access_token, revoke_token
+from app.deps import oauth2_scheme, get_current_user
+from app.security.passwords import PasswordHasherBusy, password_hasher
+from app.security.roles import role_registry
+from app.db.schemas import UserCreate, Token, UserOut, UserLogin, RoleOut  # make sure Token schema exists
 
 router = APIRouter()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Utility functions (bcrypt runs in the password hasher's process pool)
+def _hasher_busy():
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests, retry shortly",
+        headers={"Retry-After": "1"}
+    )
 
-# Utility functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash_async(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str):
+    """Return (valid, new_hash); new_hash is set when the stored hash needs upgrading."""
+    try:
+        return await password_hasher.verify_and_update_async(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
-# Register user endpoint
-@router.post("/register", response_model=UserOut)
-def register_user(user_in: UserCreate, db: Session = Depends(get_db)):
+# The two endpoints that hash are async: they await the hashing pool on the
+# event loop and only borrow a threadpool thread for their database calls
+
+def _check_new_user(db: Session, user_in: UserCreate):
     # 1. Check if email or username already exists
     existing_user = db.query(User).filter(
         (User.email == user_in.email) | (User.username == user_in.username)
@@ -32,51 +47,92 @@ def register_user(user_in: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username or email already registered"
         )
-    
-    # 2. Get role from role_id
-    role = db.query(Role).filter(Role.id == user_in.role_id).first()
-    if not role:
+
+    # 2. Resolve role_id from the preloaded registry (no roles query)
+    role = role_registry.role(user_in.role_id)
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid role_id"
         )
-    
-    # 3. Create the new user
+    return role
+
+def _insert_user(db: Session, user_in: UserCreate, role, hashed_password: str) -> UserOut:
     new_user = User(
         username=user_in.username,
         email=user_in.email,
-        hashed_password=hash_password(user_in.password),
-        role=role  # assign the relationship
+        hashed_password=hashed_password,
+        role_id=user_in.role_id
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    # 4. Return user info
-    return UserOut(
+    db.flush()
+    user_out = UserOut(
         id=new_user.id,
         username=new_user.username,
         email=new_user.email,
-        role_id=new_user.role.id,
-        role=new_user.role.name,
-        is_active=new_user.is_active
+        role=RoleOut(id=user_in.role_id, name=role.value)
     )
+    db.commit()
+    return user_out
+
+# Register user endpoint
+@router.post("/register", response_model=UserOut)
+async def register_user(user_in: UserCreate, db: Session = Depends(get_db)):
+    role = await run_in_threadpool(_check_new_user, db, user_in)
+
+    # 3. Create the new user
+    hashed_password = await hash_password(user_in.password)
+    user_out = await run_in_threadpool(_insert_user, db, user_in, role, hashed_password)
+
+    # 4. Return user info
+    return user_out
+
+def _find_user(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+def _save_hash(db: Session, user: models.User, new_hash: str):
+    user.hashed_password = new_hash
+    db.commit()
 
 # Login endpoint
 @router.post("/token", response_model=Token)
-def login_for_access_token(user_in: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username == user_in.username).first()
-    if not user or not verify_password(user_in.password, user.hashed_password):
+async def login_for_access_token(user_in: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, user_in.username)
+    valid, new_hash = await verify_password(user_in.password, user.hashed_password) if user else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
 
-    # Get role name from Role relationship
-    role_name = user.role.name if user.role else None
+    # Transparently re-hash when BCRYPT_ROUNDS changed since this hash was made
+    if new_hash:
+        await run_in_threadpool(_save_hash, db, user, new_hash)
+
+    role = await run_in_threadpool(role_registry.role, user.role_id)
+    role_name = role.value if role else None
 
     token_data = {"user_id": user.id, "username": user.username, "role": role_name}
     token = create_access_token(token_data)
 
     return {"access_token": token, "token_type": "bearer"}
 
+# Logout endpoint
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(token: str = Depends(oauth2_scheme), current_user: models.User = Depends(get_current_user)):
+    """
+    Revoke the bearer token until its exp.
+
+    The denylist lives in this worker's memory: other workers (and this one
+    after a restart) keep accepting the token until it expires, so keep
+    ACCESS_TOKEN_EXPIRE_MINUTES short. When REVOKED_TOKENS_MAX live tokens are
+    already revoked the logout is refused with 503 instead of forgetting one.
+    """
+    try:
+        revoke_token(token)
+    except RevocationListFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Logout temporarily unavailable, retry shortly",
+            headers={"Retry-After": "60"}
+        )
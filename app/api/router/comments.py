@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.core.events import change_feed
 from app.db import models, schemas
 from app.db.database import get_db
 from app.deps import get_current_user
-from typing import List
+from app.security.roles import Permission, can
+from app.api.conditional import etag_matches, make_etag, not_modified
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, poll_page
+from typing import Optional
 from sqlalchemy.orm import joinedload
 
 router = APIRouter()
@@ -19,40 +24,60 @@ def add_comment(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Task not found')
     
     # Only the assigned developer can comment
-    if current_user.role.name == "developer" and task.assignee_id != current_user.id:
+    if not can(current_user, Permission.view_all_tasks) and task.assignee_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted to comment on this task")
     
     comment = models.Comment(content=comment_in.content, task=task, author=current_user)
     db.add(comment)
     db.commit()
     db.refresh(comment)
+    change_feed.publish(
+        task.project_id, 'comment.created', schemas.CommentOut.model_validate(comment).model_dump(mode='json'),
+        task_scoped=True, assignee_id=task.assignee_id
+    )
     return comment
 
-@router.get('/task/{task_id}', response_model=List[schemas.CommentOut])
+@router.get('/task/{task_id}', response_model=schemas.CommentPage)
 def list_comments(
     task_id: int,
+    response: Response,
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if not task:
+    # One index-only query checks the task exists and fingerprints its thread
+    state = (
+        db.query(models.Task.id, func.count(models.Comment.id), func.max(models.Comment.id))
+        .outerjoin(models.Comment, models.Comment.task_id == models.Task.id)
+        .filter(models.Task.id == task_id)
+        .group_by(models.Task.id)
+        .first()
+    )
+    if not state:
         raise HTTPException(404, 'Task not found')
 
-    comments = (
+    # Weak: author usernames are part of the body but not of the fingerprint
+    etag = make_etag(task_id, state[1], state[2], since, limit, weak=True)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    query = (
         db.query(models.Comment)
         .options(joinedload(models.Comment.author))  # ✅ eager-load author
         .filter(models.Comment.task_id == task_id)
-        .all()
     )
-
-    return comments  # FastAPI + Pydantic will serialize the nested author
+    items, next_cursor, has_more = poll_page(keyset_page(query, models.Comment, since, limit).all(), limit, since)
+    response.headers['ETag'] = etag
+    return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
 
 
 @router.delete('/{comment_id}', status_code=204)
 def delete_comment(comment_id:int, db:Session=Depends(get_db), current_user:models.User=Depends(get_current_user)):
     comment = db.query(models.Comment).filter(models.Comment.id==comment_id).first()
     if not comment: raise HTTPException(404, 'Comment not found')
-    if current_user.role.name != 'admin' and comment.author_id != current_user.id:
+    if not can(current_user, Permission.moderate_comments) and comment.author_id != current_user.id:
         raise HTTPException(403, 'Not permitted')
     db.delete(comment); db.commit()
     return {}
\ No newline at end of file
@@ -1,10 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy import func, case
+from app.core.config import settings
+from app.core.events import change_feed, format_sse
 from app.db import models, schemas
+from app.db.access import accessible_project_ids, project_access_clause
+from app.db.archive import ACTIVE_PROJECT, tier_mover
+from app.db.counters import init_task_counters, project_task_total
 from app.db.database import get_db
+from app.db.deletion import project_deletions
+from app.db.membership import change_members, lock_project, missing_user_ids, set_members
 from app.deps import get_current_user
-from typing import List
+from app.security.roles import Permission, can
+from app.api.router.reporting import invalidate_reports
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
+from app.api.conditional import etag_matches, has_precondition, make_etag, not_modified, precondition_error, precondition_failed
+from typing import Dict, List, Optional
+import time
 
 router = APIRouter()
 
@@ -18,24 +33,26 @@ def create_project(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    if current_user.role.name not in ('admin', 'manager'):
+    if not can(current_user, Permission.manage_projects):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not permitted')
 
     project = models.Project(title=project_in.title, description=project_in.description)
 
     if project_in.member_ids:
-        members = db.query(models.User).filter(models.User.id.in_(project_in.member_ids)).all()
-        if len(members) != len(set(project_in.member_ids)):
-            existing_ids = [m.id for m in members]
-            invalid_ids = list(set(project_in.member_ids) - set(existing_ids))
+        invalid_ids = missing_user_ids(db, project_in.member_ids)
+        if invalid_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid member IDs: {invalid_ids}"
             )
-        project.members = members
 
     db.add(project)
+    db.flush()
+    init_task_counters(db, project.id)
+    if project_in.member_ids:
+        change_members(db, project.id, add=project_in.member_ids)
     db.commit()
+    invalidate_reports()
     db.refresh(project)
     return project
 
@@ -43,12 +60,23 @@ def create_project(
 # ---------------------------
 # LIST ALL PROJECTS
 # ---------------------------
-@router.get('/', response_model=List[schemas.ProjectOut])
+@router.get('/', response_model=schemas.ProjectPage)
 def list_projects(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_archived: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return db.query(models.Project).all()
+    # One extra SELECT ... IN for the whole page instead of one per project
+    query = db.query(models.Project).options(
+        selectinload(models.Project.members).load_only(models.User.id)
+    )
+    if not include_archived:
+        query = query.filter(ACTIVE_PROJECT)
+    query = keyset_page(query, models.Project, cursor, limit)
+    items, next_cursor = split_page(query.all(), limit)
+    return {'items': items, 'next_cursor': next_cursor}
 
 
 # ---------------------------
@@ -57,13 +85,18 @@ def list_projects(
 @router.get("/progress", response_model=List[schemas.ProjectProgress])
 @router.get("/progress/", response_model=List[schemas.ProjectProgress])
 def get_project_progress(db: Session = Depends(get_db)):
+    counter = models.ProjectTaskCounter
+    total_col = func.sum(counter.count)
     result = (
         db.query(
-            models.Task.project_id,
-            func.count(models.Task.id).label("total"),
-            func.sum(case((models.Task.status == 'done', 1), else_=0)).label("completed")
+            counter.project_id,
+            total_col.label("total"),
+            func.sum(case((counter.status == models.TaskStatus.done, counter.count), else_=0)).label("completed")
         )
-        .group_by(models.Task.project_id)
+        .join(models.Project, models.Project.id == counter.project_id)
+        .filter(ACTIVE_PROJECT)
+        .group_by(counter.project_id)
+        .having(total_col > 0)
         .all()
     )
 
@@ -86,42 +119,70 @@ def get_project_progress(db: Session = Depends(get_db)):
 # ---------------------------
 # GET USER PROJECTS
 # ---------------------------
-@router.get("/user", response_model=List[schemas.ProjectOut])
-@router.get("/user/", response_model=List[schemas.ProjectOut])
+@router.get("/user", response_model=schemas.ProjectPage)
+@router.get("/user/", response_model=schemas.ProjectPage)
 def get_user_projects(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_archived: bool = False,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    member_projects = (
-        db.query(models.Project)
-        .join(models.Project.members)
-        .filter(models.User.id == current_user.id)
-        .all()
-    )
-
-    task_projects = (
+    # Membership and assigned-task projects in one query, each project once,
+    # plus one SELECT ... IN for the page's member ids
+    query = (
         db.query(models.Project)
-        .join(models.Task)
-        .filter(models.Task.assignee_id == current_user.id)
-        .all()
+        .options(selectinload(models.Project.members).load_only(models.User.id))
+        .filter(models.Project.id.in_(accessible_project_ids(current_user.id)))
     )
-
-    # Combine and remove duplicates
-    project_dict = {p.id: p for p in member_projects + task_projects}
-    return list(project_dict.values())
+    if not include_archived:
+        query = query.filter(ACTIVE_PROJECT)
+    items, next_cursor = split_page(keyset_page(query, models.Project, cursor, limit).all(), limit)
+    return {'items': items, 'next_cursor': next_cursor}
 
 
 # ---------------------------
 # GET SINGLE PROJECT
 # ---------------------------
+def project_etag(project_id: int, version: int) -> str:
+    return make_etag('project', project_id, version)
+
+
+def _visible_project_version(db: Session, project_id: int, current_user: models.User) -> int:
+    """Existence, access and the current version in one primary-key lookup."""
+    columns = [models.Project.version]
+    if not can(current_user, Permission.view_all_projects):
+        # Restrict if user not member or assignee
+        columns.append(project_access_clause(project_id, current_user.id))
+    head = db.query(*columns).filter(models.Project.id == project_id).first()
+    if not head:
+        raise HTTPException(status_code=404, detail='Project not found')
+    if len(head) > 1 and not head[1]:
+        raise HTTPException(status_code=403, detail='Not permitted')
+    return head[0]
+
+
 @router.get('/{project_id}', response_model=schemas.ProjectDetail)
 def get_project(
     project_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
+    # Task writes and member profile edits bump the version (app.db.versioning)
+    etag = project_etag(project_id, _visible_project_version(db, project_id, current_user))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # Project, members (+ roles) and tasks of both tiers in four statements regardless of size
     project = (
         db.query(models.Project)
+        .options(
+            selectinload(models.Project.members).joinedload(models.User.role),
+            selectinload(models.Project.tasks),
+            selectinload(models.Project.archived_tasks),
+        )
         .filter(models.Project.id == project_id)
         .first()
     )
@@ -129,17 +190,53 @@ def get_project(
     if not project:
         raise HTTPException(status_code=404, detail='Project not found')
 
-    if current_user.role.name not in ('admin', 'manager'):
-        # Restrict if user not member or assignee
-        if not any(m.id == current_user.id for m in project.members) and \
-           not any(t.assignee_id == current_user.id for t in project.tasks):
-            raise HTTPException(status_code=403, detail='Not permitted')
+    response.headers['ETag'] = project_etag(project.id, project.version)
+    return project
 
-    # Ensure relationships are loaded
-    _ = project.members
-    _ = project.tasks
 
-    return project
+# ---------------------------
+# PROJECT CHANGE FEED (SSE)
+# ---------------------------
+async def _stream_project_events(project_id: int, viewer_id: Optional[int]):
+    subscription = change_feed.subscribe(project_id, viewer_id)
+    deadline = time.monotonic() + settings.EVENT_STREAM_MAX_SECONDS
+    dropped = 0
+    try:
+        # EventSource reconnects after this many ms when the stream ends
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            event = await subscription.get(settings.EVENT_STREAM_HEARTBEAT_SECONDS)
+            if subscription.dropped != dropped:
+                # This client fell behind and lost events; it must refetch
+                dropped = subscription.dropped
+                yield 'event: resync\ndata: {}\n\n'
+            yield format_sse(*event) if event else ': keepalive\n\n'
+    finally:
+        change_feed.unsubscribe(subscription)
+
+
+@router.get('/{project_id}/events')
+def project_events(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Server-sent events for the project's tasks and comments: task.created,
+    task.updated, task.status, task.deleted, tasks.bulk_created,
+    comment.created and project.deleted, each pushed once committed.
+    Users who only see their own tasks (developers) get task and comment
+    events only for tasks assigned to them; the id-only events go to everyone.
+    """
+    _visible_project_version(db, project_id, current_user)
+    viewer_id = None if can(current_user, Permission.view_all_tasks) else current_user.id
+    # The stream may stay open for minutes; do not hold a pooled connection for it
+    db.close()
+    return StreamingResponse(
+        _stream_project_events(project_id, viewer_id),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 # ---------------------------
@@ -149,66 +246,177 @@ def get_project(
 def update_project(
     project_id: int,
     project_in: schemas.ProjectUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    if current_user.role.name not in ('admin', 'manager'):
+    if not can(current_user, Permission.manage_projects):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not permitted')
 
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Project not found')
 
-    if project_in.title:
-        project.title = project_in.title
-    if project_in.description:
-        project.description = project_in.description
+    # Optimistic concurrency: the client must hold the current version
+    if precondition_failed(if_match, project_etag(project.id, project.version)):
+        raise precondition_error()
 
     if project_in.member_ids is not None:
-        members = db.query(models.User).filter(models.User.id.in_(project_in.member_ids)).all()
-        if len(members) != len(set(project_in.member_ids)):
-            existing_ids = [m.id for m in members]
-            invalid_ids = list(set(project_in.member_ids) - set(existing_ids))
+        invalid_ids = missing_user_ids(db, project_in.member_ids)
+        if invalid_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid member IDs: {invalid_ids}"
             )
-        project.members = members
 
+    if project_in.title:
+        project.title = project_in.title
+    if project_in.description:
+        project.description = project_in.description
+
+    # Always write the versioned UPDATE first: membership-only edits leave the row
+    # untouched otherwise, and the row lock orders concurrent edits of the project
+    project.updated_at = func.now()
+    try:
+        db.flush()
+    except StaleDataError:
+        db.rollback()
+        # Only a client that sent If-Match asked for a 412; anyone else gets the 409 handler
+        if has_precondition(if_match):
+            raise precondition_error()
+        raise
+
+    added, removed = [], []
+    if project_in.member_ids is not None:
+        added, removed = set_members(db, project.id, project_in.member_ids)
     db.commit()
+    invalidate_reports()
+    if added or removed:
+        change_feed.publish(project.id, 'project.members', {'id': project.id, 'added': added, 'removed': removed})
     db.refresh(project)
+    response.headers['ETag'] = project_etag(project.id, project.version)
     return project
 
 
+# ---------------------------
+# ADD / REMOVE PROJECT MEMBERS
+# ---------------------------
+@router.patch('/{project_id}/members', response_model=schemas.ProjectMembersChange)
+def update_project_members(
+    project_id: int,
+    changes: schemas.ProjectMembersPatch,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if not can(current_user, Permission.manage_projects):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not permitted')
+
+    conflicting = sorted(set(changes.add) & set(changes.remove))
+    if conflicting:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Member IDs both added and removed: {conflicting}"
+        )
+
+    version = db.query(models.Project.version).filter(models.Project.id == project_id).scalar()
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Project not found')
+    # If-Match is optional here: add/remove lists apply cleanly on top of any version
+    if precondition_failed(if_match, project_etag(project_id, version)):
+        raise precondition_error()
+
+    invalid_ids = missing_user_ids(db, changes.add)
+    if invalid_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid member IDs: {invalid_ids}"
+        )
+
+    if not lock_project(db, project_id, version if if_match else None):
+        db.rollback()
+        if if_match:
+            raise precondition_error()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Project not found')
+    added, removed = change_members(db, project_id, add=changes.add, remove=changes.remove)
+    new_version = db.query(models.Project.version).filter(models.Project.id == project_id).scalar()
+    db.commit()
+    invalidate_reports()
+    if added or removed:
+        change_feed.publish(project_id, 'project.members', {'id': project_id, 'added': added, 'removed': removed})
+    response.headers['ETag'] = project_etag(project_id, new_version)
+    return {'project_id': project_id, 'added': added, 'removed': removed}
+
+
 # ---------------------------
 # DELETE PROJECT
 # ---------------------------
-@router.delete('/{project_id}')
+def _project_deleted(project_id: int):
+    invalidate_reports()
+    change_feed.publish(project_id, 'project.deleted', {'id': project_id})
+
+
+@router.delete(
+    '/{project_id}',
+    response_model=Dict[str, bool],
+    responses={202: {'model': schemas.ProjectDeletionJob, 'description': 'Large project, deleted in the background'}},
+)
 def delete_project(
     project_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    if current_user.role.name != 'admin':
+    if not can(current_user, Permission.delete_projects):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Only admin can delete projects')
 
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Project not found')
 
-    db.delete(project)
+    total_tasks = project_task_total(db, project_id)
+    if total_tasks <= settings.PROJECT_DELETE_SYNC_MAX_TASKS:
+        # One DELETE; ON DELETE CASCADE takes tasks, comments, members and counters
+        db.delete(project)
+        db.commit()
+        _project_deleted(project_id)
+        return {'ok': True}
+
+    # Archived first: out of default reads and closed to new tasks while the job runs
+    project.is_archived = True
     db.commit()
-    return {'ok': True}
+    invalidate_reports()
+    job = project_deletions.start(project_id, total_tasks, on_done=lambda job: _project_deleted(job.project_id))
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(schemas.ProjectDeletionJob(**job.snapshot())),
+        headers={'Location': f'/api/projects/deletions/{job.id}'},
+    )
+
+
+@router.get('/deletions/{job_id}', response_model=schemas.ProjectDeletionJob)
+def get_project_deletion(job_id: str, current_user: models.User = Depends(get_current_user)):
+    if not can(current_user, Permission.delete_projects):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Only admin can delete projects')
+    job = project_deletions.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Deletion job not found')
+    return job.snapshot()
 
 # ---------------------------
 # TOGGLE PROJECT ARCHIVE
 # ---------------------------
 @router.put('/{project_id}/archive', response_model=schemas.ProjectOut)
 def toggle_archive_project(project_id:int, archive:bool, db:Session=Depends(get_db), current_user:models.User=Depends(get_current_user)):
-    if current_user.role.name not in ('admin','manager'):
+    if not can(current_user, Permission.manage_projects):
         raise HTTPException(403, 'Not permitted')
     project = db.query(models.Project).filter_by(id=project_id).first()
     if not project: raise HTTPException(404, 'Project not found')
     project.is_archived = archive
     db.commit(); db.refresh(project)
+    invalidate_reports()
+    # Tasks and comments follow the flag into the archive tables (or back) in the background
+    tier_mover.schedule(project.id)
+    change_feed.publish(project.id, 'project.archived', {'id': project.id, 'archived': archive})
     return project
\ No newline at end of file
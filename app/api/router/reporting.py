@@ -1,19 +1,37 @@
+from functools import partial
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case
 from datetime import datetime
-from app.db import models
-from app.db.database import get_db
+from typing import List
+from app.core.cache import SnapshotCache
+from app.core.config import settings
+from app.db import models, schemas
+from app.db.archive import ACTIVE_PROJECT, archived_project_ids
+from app.db.counters import project_status_counts
+from app.db.database import SessionLocal, get_db
 from app.deps import get_current_user
+from app.security.roles import Permission, can
 
 router = APIRouter()
 
+# Aggregates are global (not per user), so every admin/manager shares one snapshot
+reporting_cache = SnapshotCache(
+    ttl=settings.REPORTING_CACHE_TTL_SECONDS,
+    stale_ttl=settings.REPORTING_CACHE_STALE_SECONDS,
+)
+
+
+def invalidate_reports():
+    """Called by task/project writes after they commit."""
+    reporting_cache.invalidate()
+
 
 # --------------------------------------------
 # 🔒 Utility: Access control
 # --------------------------------------------
 def require_manager_or_admin(current_user: models.User):
-    if not current_user.role or current_user.role.name not in ("admin", "manager"):
+    if not can(current_user, Permission.view_reports):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access restricted to admins and managers only"
@@ -21,22 +39,36 @@ def require_manager_or_admin(current_user: models.User):
 
 
 # --------------------------------------------
-# 📊 Task Counts by Status (Overall)
+# 🗃️ Utility: Snapshot cache
 # --------------------------------------------
-@router.get("/task_counts")
-def task_counts(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
-):
-    require_manager_or_admin(current_user)
+def _build_in_new_session(build):
+    db = SessionLocal()
+    try:
+        return build(db)
+    finally:
+        db.close()
+
+
+def _snapshot(key, db: Session, build):
+    # Foreground misses reuse the request session; background refreshes
+    # outlive the request, so they open their own.
+    return reporting_cache.get(key, lambda: build(db), refresh=lambda: _build_in_new_session(build))
 
+
+# --------------------------------------------
+# 📊 Task Counts by Status (Overall)
+# --------------------------------------------
+def _task_counts(db: Session):
+    counter = models.ProjectTaskCounter
     q = (
-        db.query(models.Task.status, func.count(models.Task.id))
-        .group_by(models.Task.status)
+        db.query(counter.status, func.sum(counter.count))
+        .join(models.Project, models.Project.id == counter.project_id)
+        .filter(ACTIVE_PROJECT)
+        .group_by(counter.status)
         .all()
     )
 
-    result = {status: count for status, count in q}
+    result = {status.value: int(count) for status, count in q if count}
 
     # Include total count and percent breakdown
     total_tasks = sum(result.values()) or 0
@@ -50,25 +82,24 @@ def task_counts(
     return result
 
 
-# --------------------------------------------
-# 📈 Project Progress (per project)
-# --------------------------------------------
-@router.get("/project_progress/{project_id}")
-def project_progress(
-    project_id: int,
+@router.get("/task_counts", response_model=schemas.TaskCounts, response_model_exclude_none=True)
+def task_counts(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     require_manager_or_admin(current_user)
+    return _snapshot("task_counts", db, _task_counts)
 
-    total = db.query(func.count(models.Task.id)).filter(models.Task.project_id == project_id).scalar() or 0
-    done = db.query(func.count(models.Task.id)).filter(
-        models.Task.project_id == project_id, models.Task.status == "done"
-    ).scalar() or 0
-    in_progress = db.query(func.count(models.Task.id)).filter(
-        models.Task.project_id == project_id, models.Task.status == "in_progress"
-    ).scalar() or 0
-    todo = total - (done + in_progress)
+
+# --------------------------------------------
+# 📈 Project Progress (per project)
+# --------------------------------------------
+def _project_progress(db: Session, project_id: int):
+    counts = project_status_counts(db, project_id)
+    done = counts["done"]
+    in_progress = counts["in_progress"]
+    todo = counts["todo"]
+    total = todo + in_progress + done
 
     progress = (done / total * 100) if total > 0 else 0.0
 
@@ -82,16 +113,20 @@ def project_progress(
     }
 
 
-# --------------------------------------------
-# ⏰ Overdue Tasks by Project
-# --------------------------------------------
-@router.get("/overdue_by_project")
-def overdue_by_project(
+@router.get("/project_progress/{project_id}", response_model=schemas.ProjectProgressReport)
+def project_progress(
+    project_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     require_manager_or_admin(current_user)
+    return _snapshot(("project_progress", project_id), db, partial(_project_progress, project_id=project_id))
+
 
+# --------------------------------------------
+# ⏰ Overdue Tasks by Project
+# --------------------------------------------
+def _overdue_by_project(db: Session):
     now = datetime.utcnow()
 
     results = (
@@ -101,7 +136,8 @@ def overdue_by_project(
             func.count(models.Task.id).label("overdue_tasks")
         )
         .join(models.Task, models.Task.project_id == models.Project.id)
-        .filter(models.Task.due_date < now, models.Task.status != "done")
+        .filter(models.Task.due_date < now, models.Task.status != "done",
+                models.Task.project_id.not_in(archived_project_ids()))
         .group_by(models.Project.id)
         .all()
     )
@@ -116,27 +152,34 @@ def overdue_by_project(
     ]
 
 
-# --------------------------------------------
-# 🧾 Summary Dashboard (NEW)
-# --------------------------------------------
-@router.get("/summary")
-def summary_dashboard(
+@router.get("/overdue_by_project", response_model=List[schemas.OverdueProjectCount])
+def overdue_by_project(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     require_manager_or_admin(current_user)
+    return _snapshot("overdue_by_project", db, _overdue_by_project)
 
-    total_projects = db.query(func.count(models.Project.id)).scalar() or 0
-    total_tasks = db.query(func.count(models.Task.id)).scalar() or 0
+
+# --------------------------------------------
+# 🧾 Summary Dashboard (NEW)
+# --------------------------------------------
+def _summary(db: Session):
+    # Archived projects and their tasks are left out of every total
+    total_projects = db.query(func.count(models.Project.id)).filter(ACTIVE_PROJECT).scalar() or 0
+    counter = models.ProjectTaskCounter
+    total_tasks, completed_tasks = db.query(
+        func.sum(counter.count),
+        func.sum(case((counter.status == models.TaskStatus.done, counter.count), else_=0))
+    ).join(models.Project, models.Project.id == counter.project_id).filter(ACTIVE_PROJECT).one()
+    total_tasks = int(total_tasks or 0)
+    completed_tasks = int(completed_tasks or 0)
     total_users = db.query(func.count(models.User.id)).scalar() or 0
 
     overdue_tasks = db.query(func.count(models.Task.id)).filter(
         models.Task.due_date < datetime.utcnow(),
-        models.Task.status != "done"
-    ).scalar() or 0
-
-    completed_tasks = db.query(func.count(models.Task.id)).filter(
-        models.Task.status == "done"
+        models.Task.status != "done",
+        models.Task.project_id.not_in(archived_project_ids())
     ).scalar() or 0
 
     progress_percent = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0.0
@@ -151,3 +194,12 @@ def summary_dashboard(
         "overdue_tasks": overdue_tasks,
         "overall_progress_percent": round(progress_percent, 2)
     }
+
+
+@router.get("/summary", response_model=schemas.SummaryReport)
+def summary_dashboard(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    require_manager_or_admin(current_user)
+    return _snapshot("summary", db, _summary)
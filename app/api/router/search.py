@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.db import models, schemas
+from app.db.database import get_db
+from app.db.search import SUPPORTED_DIALECTS, comment_search, search_terms, snippet, task_search
+from app.deps import get_current_user
+from app.security.roles import Permission, can
+from typing import Literal, Optional
+
+router = APIRouter()
+
+
+# ---------------------------
+# SEARCH TASKS AND COMMENTS
+# ---------------------------
+@router.get('', response_model=schemas.SearchResults)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[Literal['task', 'comment']] = None,
+    project_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    dialect = db.get_bind().dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail='Search is not available on this database')
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Query has no searchable words')
+
+    developer_id = current_user.id if not can(current_user, Permission.view_all_tasks) else None
+    # Both indexes return their best offset+limit+1 rows; the merged ranking is cut from those
+    window = offset + limit + 1
+    hits = []
+    if type in (None, 'task'):
+        rows = db.execute(task_search(dialect, terms, developer_id, project_id).limit(window))
+        hits += [
+            {'type': 'task', 'id': r.id, 'task_id': r.id, 'project_id': r.project_id, 'title': r.title,
+             'snippet': snippet(r.description, terms), 'score': r.score}
+            for r in rows
+        ]
+    if type in (None, 'comment'):
+        rows = db.execute(comment_search(dialect, terms, developer_id, project_id).limit(window))
+        hits += [
+            {'type': 'comment', 'id': r.id, 'task_id': r.task_id, 'project_id': r.project_id, 'title': r.title,
+             'snippet': snippet(r.content, terms), 'score': r.score}
+            for r in rows
+        ]
+
+    hits.sort(key=lambda hit: hit['score'], reverse=True)
+    return {'items': hits[offset:offset + limit], 'has_more': len(hits) > offset + limit}
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.core.events import change_feed
+from app.core.metrics import request_metrics
+from app.db import models
+from app.db import database
+from app.db.archive import tier_mover
+from app.db.deletion import project_deletions
+from app.deps import get_current_user, principal_cache
+from app.api.router.reporting import reporting_cache
+from app.security.passwords import password_hasher
+from app.security.jwt import revoked_tokens, verified_tokens
+from app.security.roles import Permission, can
+from typing import Any, Dict
+
+router = APIRouter()
+
+
+def require_admin(current_user: models.User):
+    if not can(current_user, Permission.view_system):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not enough privileges')
+
+
+@router.get('/stats', response_model=Dict[str, Any])
+def runtime_stats(current_user: models.User = Depends(get_current_user)):
+    require_admin(current_user)
+    stats = {
+        "principal_cache": principal_cache.stats(),
+        "token_cache": verified_tokens.stats(),
+        "revoked_tokens": revoked_tokens.stats(),
+        "reporting_cache": reporting_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "change_feed": change_feed.stats(),
+        "archive": tier_mover.stats(),
+        "project_deletions": project_deletions.stats(),
+        "pool": database.pool_stats.snapshot(database.engine.pool),
+    }
+    if database.async_engine is not None:
+        stats["async_pool"] = database.async_pool_stats.snapshot(database.async_engine.sync_engine.pool)
+    return stats
+
+
+@router.get('/metrics', response_model=Dict[str, Any])
+def route_metrics(current_user: models.User = Depends(get_current_user)):
+    """Per-route latency histograms, SQL statement counts and N+1 suspects."""
+    require_admin(current_user)
+    return request_metrics.snapshot()
@@ -1,13 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from app.core.config import settings
+from app.core.events import change_feed
 from app.db import models, schemas
-from app.db.database import get_db
+from app.db.archive import ACTIVE_PROJECT, archived_project_ids
+from app.db.counters import adjust_task_counter, move_task_counter
+from app.db.database import SessionLocal, get_db
+from app.db.versioning import bump_project_versions
 from app.deps import get_current_user
+from app.security.roles import Permission, can
+from app.api.router.reporting import invalidate_reports
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
+from app.api.conditional import etag_matches, has_precondition, make_etag, not_modified, precondition_error, precondition_failed
 from datetime import datetime
+from typing import List, Literal, Optional
+from collections import Counter
+import csv
+import enum
+import io
 
 router = APIRouter()
 
 
+def publish_task(event_type: str, task: models.Task):
+    """Push a committed task change to the project's change feed subscribers."""
+    change_feed.publish(
+        task.project_id, event_type, schemas.TaskOut.model_validate(task).model_dump(mode='json'),
+        task_scoped=True, assignee_id=task.assignee_id
+    )
+
+
 @router.post('/', response_model=schemas.TaskOut)
 def create_task(
     task_in: schemas.TaskCreate,
@@ -15,12 +40,14 @@ def create_task(
     current_user: models.User = Depends(get_current_user)
 ):
     # Use .name instead of .value
-    if not current_user.role or current_user.role.name not in ('admin', 'manager'):
+    if not can(current_user, Permission.manage_tasks):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not permitted')
 
     project = db.query(models.Project).filter(models.Project.id == task_in.project_id).first()
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Project not found')
+    if project.is_archived:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Project is archived')
 
     task = models.Task(
         title=task_in.title,
@@ -35,26 +62,202 @@ def create_task(
             task.assignee = assignee
 
     db.add(task)
+    db.flush()
+    adjust_task_counter(db, project.id, task.status, 1)
+    bump_project_versions(db, [project.id])
     db.commit()
+    invalidate_reports()
     db.refresh(task)
+    publish_task('task.created', task)
     return task
 
-@router.get('/overdue')
-def overdue_tasks(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    now = datetime.utcnow()
-    return db.query(models.Task).filter(
+def _insert_task_batch(db: Session, rows: list) -> list:
+    if db.get_bind().dialect.insert_executemany_returning:
+        # One multi-row INSERT ... RETURNING per batch; render_nulls keeps rows with
+        # and without an assignee in the same statement. Autoincrement ids are
+        # handed out in VALUES order, so sorting restores the input order without
+        # sort_by_parameter_order (which degrades to row-at-a-time on SQLite).
+        stmt = insert(models.Task).returning(models.Task.id).execution_options(render_nulls=True)
+        return sorted(db.scalars(stmt, rows))
+    # No executemany RETURNING (e.g. MySQL): the ORM needs one INSERT per row for
+    # the generated ids, but still without per-row lookups, commits or refreshes
+    tasks = [models.Task(**row) for row in rows]
+    db.add_all(tasks)
+    db.flush()
+    return [task.id for task in tasks]
+
+@router.post('/bulk', response_model=schemas.TaskBulkOut)
+def create_tasks_bulk(
+    payload: schemas.TaskBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if not can(current_user, Permission.manage_tasks):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not permitted')
+
+    items = payload.tasks
+    if not items:
+        return {'created': 0, 'ids': []}
+    if len(items) > settings.BULK_TASK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_TASK_MAX_ITEMS} tasks per request"
+        )
+
+    # Validate every referenced project and assignee with one query each
+    project_ids = {t.project_id for t in items}
+    found = dict(db.query(models.Project.id, models.Project.is_archived).filter(models.Project.id.in_(project_ids)))
+    if set(found) != project_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid project IDs: {sorted(project_ids - set(found))}"
+        )
+    archived = sorted(pid for pid, is_archived in found.items() if is_archived)
+    if archived:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Archived project IDs: {archived}"
+        )
+    assignee_ids = {t.assignee_id for t in items if t.assignee_id}
+    if assignee_ids:
+        found = {uid for (uid,) in db.query(models.User.id).filter(models.User.id.in_(assignee_ids))}
+        if found != assignee_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid assignee IDs: {sorted(assignee_ids - found)}"
+            )
+
+    rows = [
+        {
+            'title': t.title,
+            'description': t.description,
+            'due_date': t.due_date,
+            'project_id': t.project_id,
+            'assignee_id': t.assignee_id or None,
+            'status': models.TaskStatus.todo,
+        }
+        for t in items
+    ]
+    ids = []
+    batch_size = settings.BULK_TASK_BATCH_SIZE
+    for start in range(0, len(rows), batch_size):
+        ids.extend(_insert_task_batch(db, rows[start:start + batch_size]))
+
+    for project_id, count in Counter(t.project_id for t in items).items():
+        adjust_task_counter(db, project_id, models.TaskStatus.todo, count)
+    bump_project_versions(db, project_ids)
+
+    db.commit()
+    invalidate_reports()
+    # ids come back in input order; one event per project rather than per row
+    created = {}
+    for task_in, task_id in zip(items, ids):
+        created.setdefault(task_in.project_id, []).append(task_id)
+    for project_id, task_ids in created.items():
+        change_feed.publish(project_id, 'tasks.bulk_created', {'project_id': project_id, 'ids': task_ids})
+    return {'created': len(ids), 'ids': ids}
+
+OVERDUE_EXPORT_COLUMNS = ('id', 'title', 'status', 'due_date', 'project_id', 'assignee_id', 'created_at')
+
+def _overdue_filter(query, now: datetime, developer_id: Optional[int]):
+    query = query.filter(
         models.Task.due_date < now,
-        models.Task.status != 'done'
-    ).all()
+        models.Task.status != 'done',
+        # Normally already moved out by the archive job; this covers the gap until it has
+        models.Task.project_id.not_in(archived_project_ids())
+    )
+    # Same scoping as list_tasks: developers only see their own tasks
+    if developer_id is not None:
+        query = query.filter(models.Task.assignee_id == developer_id)
+    return query
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _iter_overdue_rows(db: Session, now: datetime, developer_id: Optional[int]):
+    columns = [getattr(models.Task, name) for name in OVERDUE_EXPORT_COLUMNS]
+    batch_size = settings.EXPORT_BATCH_SIZE
+    query = _overdue_filter(db.query(*columns), now, developer_id)
+    if db.get_bind().dialect.supports_server_side_cursors:
+        # One statement on a server-side cursor, fetched batch_size rows at a time
+        yield from query.order_by(models.Task.id).yield_per(batch_size)
+        return
+    # Drivers without server-side cursors (e.g. mysql-connector) would buffer the
+    # whole result client-side, so walk the primary key in bounded batches instead
+    last_id = 0
+    while True:
+        rows = query.filter(models.Task.id > last_id).order_by(models.Task.id).limit(batch_size).all()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1].id
+
+def _stream_overdue(fmt: str, now: datetime, developer_id: Optional[int]):
+    # Runs after the endpoint returned, so it cannot use the request-scoped session
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(OVERDUE_EXPORT_COLUMNS)
+        for count, row in enumerate(_iter_overdue_rows(db, now, developer_id), start=1):
+            if writer:
+                writer.writerow([_export_value(v) for v in row])
+            else:
+                buffer.write(schemas.TaskExportRow.model_validate(row).model_dump_json() + '\n')
+            if count % settings.EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+@router.get('/overdue', response_model=List[schemas.TaskOut])
+def overdue_tasks(
+    format: Literal['json', 'ndjson', 'csv'] = 'json',
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    now = datetime.utcnow()
+    developer_id = current_user.id if not can(current_user, Permission.view_all_tasks) else None
+    if format == 'json':
+        return _overdue_filter(db.query(models.Task), now, developer_id).all()
+
+    # Streaming export: constant memory however large the backlog is
+    if format == 'csv':
+        return StreamingResponse(
+            _stream_overdue(format, now, developer_id),
+            media_type='text/csv',
+            headers={'Content-Disposition': 'attachment; filename="overdue_tasks.csv"'}
+        )
+    return StreamingResponse(_stream_overdue(format, now, developer_id), media_type='application/x-ndjson')
+
+def task_etag(task: models.Task) -> str:
+    return make_etag('task', task.id, task.version)
 
 @router.get('/{task_id}', response_model=schemas.TaskOut)
-def get_task(task_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def get_task(
+    task_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
     task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     # Optional: restrict access based on roles
-    if current_user.role.name == 'developer' and task.assignee_id != current_user.id:
+    if not can(current_user, Permission.view_all_tasks) and task.assignee_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
+    etag = task_etag(task)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers['ETag'] = etag
     return task
 
 
@@ -62,6 +265,8 @@ def get_task(task_id: int, db: Session = Depends(get_db), current_user: models.U
 def update_task(
     task_id: int,
     task_in: schemas.TaskUpdate,  # new Pydantic schema for optional updates
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -69,9 +274,13 @@ def update_task(
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
-    if current_user.role.name not in ('admin', 'manager'):
+    if not can(current_user, Permission.manage_tasks):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
 
+    # Optimistic concurrency: the client must hold the current version
+    if precondition_failed(if_match, task_etag(task)):
+        raise precondition_error()
+
     if task_in.title is not None:
         task.title = task_in.title
     if task_in.description is not None:
@@ -83,27 +292,57 @@ def update_task(
         if assignee:
             task.assignee = assignee
 
+    try:
+        # The UPDATE is guarded by the version read above, so a concurrent
+        # writer that got in first makes it match no row
+        db.flush()
+    except StaleDataError:
+        db.rollback()
+        # Only a client that sent If-Match asked for a 412; anyone else gets the 409 handler
+        if has_precondition(if_match):
+            raise precondition_error()
+        raise
+    bump_project_versions(db, [task.project_id])
     db.commit()
+    invalidate_reports()
     db.refresh(task)
+    publish_task('task.updated', task)
+    response.headers['ETag'] = task_etag(task)
     return task
 
-@router.get('/')
+@router.get('/', response_model=schemas.TaskPage)
 def list_tasks(
-    project_id: int = None,
+    project_id: Optional[int] = None,
+    status_filter: Optional[models.TaskStatus] = Query(None, alias='status'),
+    assignee_id: Optional[int] = None,
+    due_before: Optional[datetime] = None,
+    due_after: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    query = db.query(models.Task)
+    # Tasks of an archived project leave active listings at once, not as TierMover reaches them
+    query = db.query(models.Task).join(models.Project, models.Project.id == models.Task.project_id).filter(ACTIVE_PROJECT)
     if project_id:
         query = query.filter(models.Task.project_id == project_id)
-    
+    if status_filter:
+        query = query.filter(models.Task.status == status_filter)
+    if assignee_id:
+        query = query.filter(models.Task.assignee_id == assignee_id)
+    if due_before:
+        query = query.filter(models.Task.due_date < due_before)
+    if due_after:
+        query = query.filter(models.Task.due_date >= due_after)
+
     # Developers see only their tasks
-    if current_user.role.name == 'developer':
+    if not can(current_user, Permission.view_all_tasks):
         query = query.filter(models.Task.assignee_id == current_user.id)
-    
-    return query.all()
 
-@router.put('/{task_id}/status')
+    items, next_cursor = split_page(keyset_page(query, models.Task, cursor, limit).all(), limit)
+    return {'items': items, 'next_cursor': next_cursor}
+
+@router.put('/{task_id}/status', response_model=schemas.TaskStatusOut)
 def update_task_status(
     task_id: int,
     status_in: dict,
@@ -114,19 +353,25 @@ def update_task_status(
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Task not found')
 
-    if current_user.role and current_user.role.name == 'developer' and task.assignee_id != current_user.id:
+    if not can(current_user, Permission.manage_tasks) and task.assignee_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not permitted')
 
     new_status = status_in.get('status')
     if new_status not in ('todo', 'in_progress', 'done'):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid status')
 
+    old_status = task.status
     task.status = new_status
+    db.flush()
+    move_task_counter(db, task.project_id, old_status, new_status)
+    bump_project_versions(db, [task.project_id])
     db.commit()
+    invalidate_reports()
     db.refresh(task)
+    publish_task('task.status', task)
     return {'ok': True, 'status': task.status}
 
-@router.put("/{task_id}/deadline")
+@router.put("/{task_id}/deadline", response_model=schemas.TaskDeadlineOut)
 def update_task_deadline(
     task_id: int,
     new_deadline: dict,
@@ -138,7 +383,7 @@ def update_task_deadline(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
     # Only admins/managers or task assignee can update the deadline
-    if current_user.role and current_user.role.name not in ("admin", "manager") and task.assignee_id != current_user.id:
+    if not can(current_user, Permission.manage_tasks) and task.assignee_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
 
     due_date = new_deadline.get("due_date")
@@ -146,8 +391,11 @@ def update_task_deadline(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing due_date")
 
     task.due_date = due_date
+    bump_project_versions(db, [task.project_id])
     db.commit()
+    invalidate_reports()
     db.refresh(task)
+    publish_task('task.updated', task)
     return {"ok": True, "task_id": task.id, "due_date": task.due_date}
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -161,11 +409,17 @@ def delete_task(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
     # Only admins or managers can delete tasks
-    if current_user.role and current_user.role.name not in ("admin", "manager"):
+    if not can(current_user, Permission.manage_tasks):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
 
+    project_id, task_status = task.project_id, task.status
     db.delete(task)
+    db.flush()
+    adjust_task_counter(db, project_id, task_status, -1)
+    bump_project_versions(db, [project_id])
     db.commit()
+    invalidate_reports()
+    change_feed.publish(project_id, 'task.deleted', {'id': task_id, 'project_id': project_id})
     return {"ok": True, "message": "Task deleted successfully"}
 
 
@@ -3,7 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db import models, schemas
 from app.db.database import get_db
-from app.deps import get_current_user
+from app.db.versioning import bump_member_projects
+from app.deps import get_current_user, invalidate_principal
+from app.security.roles import Permission, can
 
 router = APIRouter()
 
@@ -13,14 +15,14 @@ def read_own_profile(current_user:models.User=Depends(get_current_user)):
 
 @router.get('/', response_model=list[schemas.UserOut])
 def list_users(db:Session=Depends(get_db), current_user:models.User=Depends(get_current_user)):
-    if current_user.role.name!='admin':
+    if not can(current_user, Permission.manage_users):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not enough privileges')
     return db.query(models.User).all()
 
 # GET user by id (admin)
 @router.get('/{user_id}', response_model=schemas.UserOut)
 def get_user(user_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    if not current_user.role or current_user.role.name != 'admin':
+    if not can(current_user, Permission.manage_users):
         raise HTTPException(status_code=403, detail='Not enough privileges')
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
@@ -37,5 +39,7 @@ class UserUpdate(BaseModel):
 def update_own_profile(payload: UserUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
     if payload.username: current_user.username = payload.username
     if payload.email: current_user.email = payload.email
+    bump_member_projects(db, current_user.id)
     db.commit(); db.refresh(current_user)
+    invalidate_principal(current_user.id)
     return current_user
\ No newline at end of file
@@ -0,0 +1,230 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class ExpiringSet:
+    """
+    Thread-safe set whose members each expire at their own deadline. Members
+    are never evicted early: once `maxsize` live members are held, add()
+    refuses new ones instead of dropping old ones.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._members = {}  # key -> expires_at (monotonic)
+        self._deadlines = []  # heap of (expires_at, key); may hold superseded entries
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _purge(self, now):
+        while self._deadlines and self._deadlines[0][0] <= now:
+            expires_at, key = heapq.heappop(self._deadlines)
+            if self._members.get(key) == expires_at:
+                del self._members[key]
+
+    def add(self, key, ttl: float = None) -> bool:
+        """Add `key` until `ttl` seconds from now (forever when None); False when full."""
+        now = time.monotonic()
+        expires_at = float('inf') if ttl is None else now + ttl
+        with self._lock:
+            self._purge(now)
+            if key not in self._members and len(self._members) >= self.maxsize:
+                self.rejected += 1
+                return False
+            expires_at = max(expires_at, self._members.get(key, expires_at))
+            self._members[key] = expires_at
+            if expires_at != float('inf'):
+                heapq.heappush(self._deadlines, (expires_at, key))
+            return True
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            expires_at = self._members.get(key)
+            return expires_at is not None and expires_at > time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._purge(time.monotonic())
+            return {"size": len(self._members), "maxsize": self.maxsize, "rejected": self.rejected}
+
+
+class SnapshotCache:
+    """
+    Caches computed snapshots per key. A snapshot is fresh for `ttl` seconds,
+    then served stale for up to `stale_ttl` more seconds while one background
+    refresh runs. Concurrent misses on a key share a single computation.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}  # key -> (computed_at, value)
+        self._prune_at = 1024  # entry count that triggers dropping expired snapshots
+        self._key_locks = {}  # key -> [lock, holders]; dropped when the last holder leaves
+        self._refreshing = set()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _claim_key_lock(self, key):
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release_key_lock(self, key):
+        # Keys come from request input, so locks must not outlive their waiters
+        with self._lock:
+            entry = self._key_locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._key_locks[key]
+
+    def _store(self, key, value, generation):
+        with self._lock:
+            # Drop results computed from data that was invalidated meanwhile
+            if generation == self._generation:
+                now = time.monotonic()
+                self._entries[key] = (now, value)
+                if len(self._entries) >= self._prune_at:
+                    # Amortized: only as often as the entry count doubles
+                    limit = self.ttl + self.stale_ttl
+                    self._entries = {k: e for k, e in self._entries.items() if now - e[0] < limit}
+                    self._prune_at = max(1024, 2 * len(self._entries))
+
+    def _lookup(self, key):
+        """Return (state, value) where state is 'fresh', 'stale' or None."""
+        entry = self._entries.get(key)
+        if entry is None or self.ttl <= 0:
+            return None, None
+        age = time.monotonic() - entry[0]
+        if age < self.ttl:
+            return 'fresh', entry[1]
+        if age < self.ttl + self.stale_ttl:
+            return 'stale', entry[1]
+        return None, None
+
+    def _refresh(self, key, refresh, generation):
+        try:
+            self._store(key, refresh(), generation)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key, compute, refresh=None):
+        """
+        Return the snapshot for `key`, calling `compute()` on a miss.
+
+        `refresh` is used for background revalidation of stale entries and must
+        not depend on request-scoped resources; without it stale entries are
+        recomputed in the foreground.
+        """
+        with self._lock:
+            state, value = self._lookup(key)
+            generation = self._generation
+            if state == 'fresh':
+                self.hits += 1
+                return value
+            if state == 'stale' and refresh is not None:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self.refreshes += 1
+                    threading.Thread(target=self._refresh, args=(key, refresh, generation), daemon=True).start()
+                return value
+
+        key_lock = self._claim_key_lock(key)
+        try:
+            with key_lock:
+                with self._lock:
+                    state, value = self._lookup(key)
+                    generation = self._generation
+                    if state == 'fresh':
+                        self.hits += 1
+                        return value
+                    self.misses += 1
+                value = compute()
+                self._store(key, value, generation)
+                return value
+        finally:
+            self._release_key_lock(key)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "stale_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "background_refreshes": self.refreshes,
+            }
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -6,8 +7,62 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Password hashing: bcrypt cost and the dedicated process pool running it
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_DEPTH: int = 16
+
     # Database
     DATABASE_URL: str
+    # Opt-in async request path, e.g. mysql+aiomysql://... or sqlite+aiosqlite:///...
+    # Needs sqlalchemy[asyncio] plus the async driver installed.
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connection pool (ignored for SQLite); keep size + overflow in line with worker count
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_ECHO: bool = False
+    # Run create_all when a worker starts (local development only; deployments
+    # run scripts/create_db.py or scripts/migrate_db.py once instead)
+    CREATE_TABLES_ON_STARTUP: bool = False
+
+    # Caching
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    TOKEN_CACHE_SIZE: int = 10000
+    # Logged-out tokens remembered (per worker) until they expire; logout
+    # answers 503 rather than forget one when the list is full
+    REVOKED_TOKENS_MAX: int = 100000
+    REPORTING_CACHE_TTL_SECONDS: int = 30
+    REPORTING_CACHE_STALE_SECONDS: int = 60
+
+    # Bulk task import
+    BULK_TASK_MAX_ITEMS: int = 10000
+    BULK_TASK_BATCH_SIZE: int = 1000
+
+    # Streaming exports: rows fetched per round trip
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Request metrics (Server-Timing header, /api/system/metrics)
+    REQUEST_METRICS_ENABLED: bool = True
+
+    # Change feed (per-project server-sent events)
+    EVENT_QUEUE_SIZE: int = 100
+    EVENT_STREAM_HEARTBEAT_SECONDS: int = 15
+    # Streams end after this long and the client reconnects, so proxies never see an idle-forever response
+    EVENT_STREAM_MAX_SECONDS: int = 600
+
+    # Archive tiering: tasks (with their comments) moved per transaction
+    ARCHIVE_BATCH_SIZE: int = 500
+
+    # Project deletes: larger projects are deleted by a background job, in
+    # batches of tasks (with their comments) per transaction
+    PROJECT_DELETE_SYNC_MAX_TASKS: int = 1000
+    PROJECT_DELETE_BATCH_SIZE: int = 500
+    # Finished deletion jobs remembered for the status endpoint
+    PROJECT_DELETE_JOBS_KEPT: int = 100
 
     # Project
     PROJECT_NAME: str = "FastAPI With React"
@@ -0,0 +1,114 @@
+import asyncio
+import itertools
+import json
+import threading
+
+from app.core.config import settings
+
+
+class Subscription:
+    """
+    One stream's bounded inbox. Lives on the event loop that created it; when
+    full, the oldest event is dropped so a slow client only ever loses its own
+    backlog and never blocks publishers. A `viewer_id` limits task-scoped
+    events to tasks assigned to that user, as get_task does for developers.
+    """
+
+    def __init__(self, project_id: int, maxsize: int, viewer_id: int = None):
+        self.project_id = project_id
+        self.viewer_id = viewer_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max(maxsize, 1))
+        self.dropped = 0
+
+    def sees(self, task_scoped: bool, assignee_id) -> bool:
+        return not task_scoped or self.viewer_id is None or self.viewer_id == assignee_id
+
+    def _push(self, event):
+        # Only ever runs on self.loop, so the full check and the put cannot race
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float):
+        """Next event, or None when nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ChangeBroker:
+    """
+    In-process fan-out of change events to per-project subscribers.
+
+    `publish` may be called from any thread (sync routes run in the threadpool)
+    and never waits on subscribers. Only streams connected to this process see
+    its events; running several workers needs an external bus in front of this.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._subscribers = {}  # project_id -> set of Subscription
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, project_id: int, viewer_id: int = None) -> Subscription:
+        subscription = Subscription(project_id, self.maxsize, viewer_id)
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.project_id]
+            self.dropped += subscription.dropped
+
+    def publish(self, project_id: int, event_type: str, data: dict, task_scoped: bool = False, assignee_id: int = None):
+        """
+        Queue an event for every subscriber of the project; call after commit.
+        Task-scoped events (task or comment contents) only reach subscribers
+        allowed to read that task, i.e. those without a viewer or its assignee.
+        """
+        with self._lock:
+            self.published += 1
+            subscribers = [
+                s for s in self._subscribers.get(project_id, ())
+                if s.sees(task_scoped, assignee_id)
+            ]
+            if not subscribers:
+                return
+            event_id = next(self._ids)
+        # Serialized once, however many streams receive it
+        event = (event_id, event_type, json.dumps(data, default=str))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._push, event)
+            except RuntimeError:
+                # Loop already closed (shutdown); the stream is gone anyway
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscriptions = [s for subs in self._subscribers.values() for s in subs]
+            return {
+                "projects": len(self._subscribers),
+                "subscribers": len(subscriptions),
+                "queue_size": self.maxsize,
+                "published": self.published,
+                "dropped": self.dropped + sum(s.dropped for s in subscriptions),
+            }
+
+
+change_feed = ChangeBroker(maxsize=settings.EVENT_QUEUE_SIZE)
+
+
+def format_sse(event_id: int, event_type: str, payload: str) -> str:
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
@@ -0,0 +1,239 @@
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# A route is flagged once enough samples show its statement count tracking response size
+N_PLUS_ONE_MIN_SAMPLES = 20
+N_PLUS_ONE_CORRELATION = 0.8
+# ...and growing with it: a bounded branch (e.g. 7 vs 8 statements for an optional
+# field) correlates perfectly with size but never spreads this far
+N_PLUS_ONE_MIN_SPREAD = 5
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Per-request accumulator, shared by the request task and its threadpool calls."""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.segments = {}
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} queries"']
+        parts += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.segments.items()]
+        parts.append(f'total;dur={total_seconds * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def record_segment(name: str, seconds: float):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.segments[name] = metrics.segments.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(name: str):
+    """Attribute the enclosed block to `name` in the current request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_segment(name, time.perf_counter() - started)
+
+
+def instrument_engine(engine):
+    """Count statements and time spent in the driver for whichever request issued them."""
+    # Imported here so the password hashing processes, which only need
+    # record_segment's module, do not load SQLAlchemy
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.statements += 1
+            metrics.db_seconds += time.perf_counter() - context._metrics_started
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.server_errors = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.db_total = 0.0
+        self.statements_total = 0
+        self.statements_min = None
+        self.statements_max = 0
+        self.suspected_n_plus_one = False
+        # Running sums for the correlation between response size and statement count
+        self._sx = self._sy = self._sxx = self._syy = self._sxy = 0.0
+
+    def add(self, latency_ms: float, metrics: RequestMetrics, size: int, status_code: int):
+        self.requests += 1
+        self.server_errors += status_code >= 500
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= bound), len(LATENCY_BUCKETS_MS))
+        self.buckets[index] += 1
+        self.latency_total += latency_ms
+        self.latency_max = max(self.latency_max, latency_ms)
+        self.db_total += metrics.db_seconds * 1000
+        self.statements_total += metrics.statements
+        self.statements_max = max(self.statements_max, metrics.statements)
+        if self.statements_min is None or metrics.statements < self.statements_min:
+            self.statements_min = metrics.statements
+        x, y = float(size), float(metrics.statements)
+        self._sx += x
+        self._sy += y
+        self._sxx += x * x
+        self._syy += y * y
+        self._sxy += x * y
+
+    def size_correlation(self):
+        n = self.requests
+        var_x = n * self._sxx - self._sx ** 2
+        var_y = n * self._syy - self._sy ** 2
+        # Constant statement counts (the healthy case) have no correlation to speak of
+        if n < 2 or var_x <= 0 or var_y <= 0:
+            return None
+        return (n * self._sxy - self._sx * self._sy) / math.sqrt(var_x * var_y)
+
+    def percentile(self, pct: float):
+        """Upper bound of the histogram bucket holding the pct-th percentile (None = overflow)."""
+        target = math.ceil(self.requests * pct / 100)
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS + (None,), self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        n = self.requests
+        correlation = self.size_correlation()
+        return {
+            "requests": n,
+            "server_errors": self.server_errors,
+            "latency_ms": {
+                "avg": round(self.latency_total / n, 3) if n else 0.0,
+                "max": round(self.latency_max, 3),
+                "p50_le": self.percentile(50),
+                "p95_le": self.percentile(95),
+                "p99_le": self.percentile(99),
+                "histogram": {
+                    **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)},
+                    "inf": self.buckets[-1],
+                },
+            },
+            "db_ms_avg": round(self.db_total / n, 3) if n else 0.0,
+            "statements_avg": round(self.statements_total / n, 2) if n else 0.0,
+            "statements_min": self.statements_min or 0,
+            "statements_max": self.statements_max,
+            "size_statement_correlation": round(correlation, 3) if correlation is not None else None,
+            "suspected_n_plus_one": self.suspected_n_plus_one,
+        }
+
+
+class RequestMetricsRegistry:
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, latency_ms: float, metrics: RequestMetrics, size: int, status_code: int):
+        with self._lock:
+            stats = self._routes.setdefault(route, RouteStats())
+            stats.add(latency_ms, metrics, size, status_code)
+            if stats.suspected_n_plus_one or stats.requests < N_PLUS_ONE_MIN_SAMPLES:
+                return
+            if stats.statements_max - stats.statements_min < N_PLUS_ONE_MIN_SPREAD:
+                return
+            correlation = stats.size_correlation()
+            if correlation is None or correlation < N_PLUS_ONE_CORRELATION:
+                return
+            stats.suspected_n_plus_one = True
+        logger.warning(
+            "Possible N+1 on %s: statement count tracks response size (r=%.2f, %d-%d statements)",
+            route, correlation, stats.statements_min, stats.statements_max
+        )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {route: stats.snapshot() for route, stats in sorted(self._routes.items())}
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+request_metrics = RequestMetricsRegistry()
+
+
+def _route_template(scope, route) -> str:
+    """Full path template of the matched route, e.g. /api/projects/{project_id}."""
+    # Routes of included routers may only know their path relative to the router
+    # prefix; recover the prefix from the concrete path the route matched.
+    path = scope['path']
+    try:
+        rendered = route.path_format.format(**scope.get('path_params', {}))
+    except (KeyError, IndexError, ValueError):
+        return route.path_format
+    if path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + route.path_format
+    return route.path_format
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware: opens a RequestMetrics for every HTTP request, adds a
+    Server-Timing header (db, auth, hash, total) and records per-route stats
+    once the response body has been sent. For streamed responses the header
+    only covers the work done before the first chunk.
+    """
+
+    def __init__(self, app, registry: RequestMetricsRegistry = request_metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_with_timing(message):
+            nonlocal status_code, size
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                MutableHeaders(scope=message).append('Server-Timing', metrics.server_timing(time.perf_counter() - started))
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get('route')
+            # Unmatched paths (404s) are not worth a histogram each
+            if route is not None:
+                latency_ms = (time.perf_counter() - started) * 1000
+                self.registry.record(f"{scope['method']} {_route_template(scope, route)}", latency_ms, metrics, size, status_code)
@@ -0,0 +1,26 @@
+from sqlalchemy import exists, or_, select, union
+from app.db.models import Task, project_members
+
+
+def project_access_clause(project_id, user_id):
+    """
+    SQL condition: the user is a member of the project or is assigned a task in it.
+
+    `project_id` may be a literal id or a correlated column such as Project.id.
+    """
+    return or_(
+        exists().where(project_members.c.project_id == project_id, project_members.c.user_id == user_id),
+        exists().where(Task.project_id == project_id, Task.assignee_id == user_id),
+    )
+
+
+def accessible_project_ids(user_id):
+    """
+    SELECT of the ids of every project the user is a member of or holds a task
+    in, each once. Driven by the user's own index entries, so its cost follows
+    the user's projects rather than the size of the projects table.
+    """
+    return union(
+        select(project_members.c.project_id).where(project_members.c.user_id == user_id),
+        select(Task.project_id).where(Task.assignee_id == user_id),
+    )
@@ -0,0 +1,134 @@
+import logging
+import threading
+
+from sqlalchemy import delete, false, insert, select, true
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import ArchivedComment, ArchivedTask, Comment, Project, Task
+
+logger = logging.getLogger(__name__)
+
+# Default reads filter on this; it matches the partial index ix_projects_active_created_id
+ACTIVE_PROJECT = Project.is_archived == false()
+
+
+def archived_project_ids():
+    """SELECT of archived project ids, for keeping their not-yet-moved tasks out of aggregates."""
+    return select(Project.id).where(Project.is_archived == true())
+
+
+# (tasks table, comments table) of each tier; both tiers share column names
+HOT = (Task.__table__, Comment.__table__)
+COLD = (ArchivedTask.__table__, ArchivedComment.__table__)
+
+
+def _copy(db: Session, source, target, where):
+    columns = [column.name for column in target.columns]
+    db.execute(insert(target).from_select(columns, select(*[source.c[name] for name in columns]).where(where)))
+
+
+def _move_batch(db: Session, project_id: int, source, target, batch_size: int) -> int:
+    """
+    Move up to `batch_size` of the project's tasks, with their comments, from
+    one tier to the other. Returns the number of tasks moved.
+    """
+    tasks, comments = source
+    target_tasks, target_comments = target
+    # Locked, so no task edit can slip in between the copy and the delete
+    ids = list(db.scalars(
+        select(tasks.c.id).where(tasks.c.project_id == project_id)
+        .order_by(tasks.c.id).limit(batch_size).with_for_update()
+    ))
+    if not ids:
+        return 0
+    # Parents before children on the way in, children before parents on the way out
+    _copy(db, tasks, target_tasks, tasks.c.id.in_(ids))
+    _copy(db, comments, target_comments, comments.c.task_id.in_(ids))
+    db.execute(delete(comments).where(comments.c.task_id.in_(ids)))
+    db.execute(delete(tasks).where(tasks.c.id.in_(ids)))
+    return len(ids)
+
+
+def sync_project_tier(project_id: int, batch_size: int = None) -> int:
+    """
+    Move the project's tasks and comments to the tier matching is_archived:
+    archived projects to the archive tables, active ones back to the hot
+    tables. One transaction per batch, so hot tables are never locked for
+    long; the flag is re-read every batch, so a project toggled again midway
+    simply turns around. Task counters are not touched: they count a
+    project's tasks in either tier. Returns the number of tasks moved.
+    """
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    moved = 0
+    db = SessionLocal()
+    try:
+        while True:
+            archived = db.scalar(select(Project.is_archived).where(Project.id == project_id))
+            if archived is None:
+                return moved  # project deleted
+            source, target = (HOT, COLD) if archived else (COLD, HOT)
+            count = _move_batch(db, project_id, source, target, batch_size)
+            db.commit()
+            if not count:
+                return moved
+            moved += count
+    finally:
+        db.close()
+
+
+def pending_project_ids(db: Session) -> list:
+    """Projects with tasks in the wrong tier (archived with hot tasks, active with archived ones)."""
+    misplaced = (
+        select(Task.project_id).join(Project, Project.id == Task.project_id).where(Project.is_archived == true())
+        .union(
+            select(ArchivedTask.project_id).join(Project, Project.id == ArchivedTask.project_id)
+            .where(ACTIVE_PROJECT)
+        )
+    )
+    return sorted(db.scalars(misplaced))
+
+
+class TierMover:
+    """
+    Runs sync_project_tier for toggled projects on background threads, one
+    at a time per project. A toggle that arrives while its project is being
+    moved is picked up by the running thread, which re-reads the flag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = set()
+        self._again = set()
+        self.moved = 0
+
+    def schedule(self, project_id: int):
+        with self._lock:
+            if project_id in self._running:
+                self._again.add(project_id)
+                return
+            self._running.add(project_id)
+        threading.Thread(target=self._run, args=(project_id,), daemon=True).start()
+
+    def _run(self, project_id: int):
+        while True:
+            try:
+                moved = sync_project_tier(project_id)
+            except Exception:
+                # Left for scripts/archive_projects.py (or the next toggle) to finish
+                logger.exception("Moving tasks of project %s between tiers failed", project_id)
+                moved = 0
+            with self._lock:
+                self.moved += moved
+                if project_id not in self._again:
+                    self._running.discard(project_id)
+                    return
+                self._again.discard(project_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'running': len(self._running), 'tasks_moved': self.moved}
+
+
+tier_mover = TierMover()
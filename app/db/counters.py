@@ -0,0 +1,99 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.db.models import ArchivedTask, Project, ProjectTaskCounter, Task, TaskStatus
+
+
+def _as_status(value) -> TaskStatus:
+    return TaskStatus(value) if value is not None else TaskStatus.todo
+
+
+def _actual_counts(db: Session, project_ids=None) -> dict:
+    # Archived projects keep their counters: their tasks count in either tier
+    counts = {}
+    for model in (Task, ArchivedTask):
+        query = db.query(model.project_id, model.status, func.count(model.id)).group_by(model.project_id, model.status)
+        if project_ids is not None:
+            query = query.filter(model.project_id.in_(project_ids))
+        for project_id, status, count in query.all():
+            key = (project_id, _as_status(status))
+            counts[key] = counts.get(key, 0) + count
+    return counts
+
+
+def init_task_counters(db: Session, project_id: int):
+    """Create zeroed counter rows for a new project so later updates never need an insert."""
+    db.add_all([ProjectTaskCounter(project_id=project_id, status=s, count=0) for s in TaskStatus])
+
+
+def apply_task_counter_deltas(db: Session, project_id: int, deltas: dict):
+    """
+    Apply {status: delta} to the project's counters inside the caller's transaction.
+
+    Pending task changes must already be flushed: when a counter row is missing
+    (a project that predates the counters table) the project is recounted from
+    the flushed state once, which already includes every delta, so the remaining
+    deltas are skipped.
+    """
+    for status, delta in deltas.items():
+        if not delta:
+            continue
+        updated = (
+            db.query(ProjectTaskCounter)
+            .filter(ProjectTaskCounter.project_id == project_id, ProjectTaskCounter.status == _as_status(status))
+            .update({ProjectTaskCounter.count: ProjectTaskCounter.count + delta}, synchronize_session=False)
+        )
+        if not updated:
+            rebuild_task_counters(db, [project_id])
+            return
+
+
+def adjust_task_counter(db: Session, project_id: int, status, delta: int):
+    """Apply `delta` to one (project, status) counter; see apply_task_counter_deltas."""
+    apply_task_counter_deltas(db, project_id, {status: delta})
+
+
+def move_task_counter(db: Session, project_id: int, old_status, new_status):
+    if _as_status(old_status) != _as_status(new_status):
+        apply_task_counter_deltas(db, project_id, {_as_status(old_status): -1, _as_status(new_status): 1})
+
+
+def rebuild_task_counters(db: Session, project_ids=None):
+    """Recount tasks and rewrite the counter rows (all projects, or only `project_ids`)."""
+    if project_ids is None:
+        project_ids = [pid for (pid,) in db.query(Project.id).all()]
+        db.query(ProjectTaskCounter).delete(synchronize_session=False)
+        actual = _actual_counts(db)
+    else:
+        db.query(ProjectTaskCounter).filter(ProjectTaskCounter.project_id.in_(project_ids)).delete(synchronize_session=False)
+        actual = _actual_counts(db, project_ids)
+    db.bulk_insert_mappings(ProjectTaskCounter, [
+        {"project_id": pid, "status": s, "count": actual.get((pid, s), 0)}
+        for pid in project_ids for s in TaskStatus
+    ])
+
+
+def verify_task_counters(db: Session) -> list:
+    """Return (project_id, status, stored, actual) for every counter that has drifted."""
+    stored = {(row.project_id, _as_status(row.status)): row.count for row in db.query(ProjectTaskCounter).all()}
+    actual = _actual_counts(db)
+    drift = []
+    for key in sorted(set(stored) | set(actual), key=lambda k: (k[0], k[1].value)):
+        if stored.get(key, 0) != actual.get(key, 0):
+            drift.append((key[0], key[1].value, stored.get(key, 0), actual.get(key, 0)))
+    return drift
+
+
+def project_status_counts(db: Session, project_id: int) -> dict:
+    rows = db.query(ProjectTaskCounter.status, ProjectTaskCounter.count).filter(ProjectTaskCounter.project_id == project_id).all()
+    counts = {s.value: 0 for s in TaskStatus}
+    for status, count in rows:
+        counts[_as_status(status).value] = count
+    return counts
+
+
+def project_task_total(db: Session, project_id: int) -> int:
+    """Tasks in the project across both tiers, counted for real when it has no counter rows yet."""
+    rows = db.query(ProjectTaskCounter.count).filter(ProjectTaskCounter.project_id == project_id).all()
+    if rows:
+        return sum(count for (count,) in rows)
+    return sum(_actual_counts(db, [project_id]).values())
@@ -1,16 +1,53 @@
 # app/db/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings  # Make sure settings.DATABASE_URL exists
+from app.db.pool import PoolStats, engine_options
+from app.core.metrics import instrument_engine
 
 Base = declarative_base()
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and so ON DELETE CASCADE, unless each connection opts in
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+pool_stats = PoolStats()
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, pool_stats))
+pool_stats.attach(engine)
+instrument_engine(engine)
+if engine.dialect.name == 'sqlite':
+    event.listen(engine, 'connect', _enable_sqlite_foreign_keys)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine/session only exist when ASYNC_DATABASE_URL is configured, so the
+# default sync deployment does not need greenlet or an async driver installed.
+async_engine = None
+AsyncSessionLocal = None
+async_pool_stats = None
+if settings.ASYNC_DATABASE_URL:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_pool_stats = PoolStats()
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        **engine_options(settings.ASYNC_DATABASE_URL, async_pool_stats, is_async=True)
+    )
+    async_pool_stats.attach(async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine)
+    if async_engine.dialect.name == 'sqlite':
+        event.listen(async_engine.sync_engine, 'connect', _enable_sqlite_foreign_keys)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,128 @@
+import logging
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.counters import apply_task_counter_deltas
+from app.db.database import SessionLocal
+from app.db.models import ArchivedTask, Project, Task
+from app.db.versioning import bump_project_versions
+
+logger = logging.getLogger(__name__)
+
+
+def delete_task_batch(db: Session, project_id: int, batch_size: int) -> int:
+    """
+    Delete up to `batch_size` of the project's tasks, hot tier first, then
+    archived. Their comments go with them through ON DELETE CASCADE. Counters
+    and the project version follow in the same transaction. Returns the
+    number of tasks deleted.
+    """
+    for model in (Task, ArchivedTask):
+        rows = db.execute(
+            select(model.id, model.status).where(model.project_id == project_id)
+            .order_by(model.id).limit(batch_size).with_for_update()
+        ).all()
+        if not rows:
+            continue
+        db.execute(delete(model).where(model.id.in_([row.id for row in rows])))
+        deleted = Counter(row.status for row in rows)
+        apply_task_counter_deltas(db, project_id, {status: -count for status, count in deleted.items()})
+        bump_project_versions(db, [project_id])
+        return len(rows)
+    return 0
+
+
+class DeletionJob:
+    def __init__(self, project_id: int, total_tasks: int):
+        self.id = uuid.uuid4().hex
+        self.project_id = project_id
+        self.status = 'running'
+        self.total_tasks = total_tasks
+        self.deleted_tasks = 0
+        self.error = None
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at = None
+
+    def snapshot(self) -> dict:
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'status': self.status,
+            'total_tasks': self.total_tasks,
+            'deleted_tasks': self.deleted_tasks,
+            'error': self.error,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class ProjectDeletions:
+    """
+    Background deletion of large projects, one job per project, one batch per
+    transaction so no statement holds locks on more than a batch of tasks.
+    Jobs live in the worker that accepted the DELETE, like the change feed;
+    the last `keep` finished ones stay visible to the status endpoint.
+    """
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job id -> DeletionJob, oldest first
+        self._running = {}  # project id -> running DeletionJob
+
+    def start(self, project_id: int, total_tasks: int, on_done=None) -> DeletionJob:
+        """Start deleting the project, or return the job already doing so."""
+        with self._lock:
+            job = self._running.get(project_id)
+            if job is not None:
+                return job
+            job = DeletionJob(project_id, total_tasks)
+            self._jobs[job.id] = job
+            self._running[project_id] = job
+        threading.Thread(target=self._run, args=(job, on_done), daemon=True).start()
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: DeletionJob, on_done):
+        db = SessionLocal()
+        try:
+            while True:
+                count = delete_task_batch(db, job.project_id, settings.PROJECT_DELETE_BATCH_SIZE)
+                db.commit()
+                if not count:
+                    break
+                job.deleted_tasks += count
+            # Only members and counters are left for the cascade
+            db.execute(delete(Project).where(Project.id == job.project_id))
+            db.commit()
+            job.status = 'done'
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Deleting project %s failed", job.project_id)
+            job.status, job.error = 'failed', str(exc)
+        finally:
+            db.close()
+            job.finished_at = datetime.now(timezone.utc)
+            with self._lock:
+                self._running.pop(job.project_id, None)
+                finished = [j for j in self._jobs.values() if j.status != 'running']
+                for old in finished[:max(len(finished) - self.keep, 0)]:
+                    del self._jobs[old.id]
+        if on_done is not None and job.status == 'done':
+            on_done(job)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'running': len(self._running), 'tracked': len(self._jobs)}
+
+
+project_deletions = ProjectDeletions(keep=settings.PROJECT_DELETE_JOBS_KEPT)
@@ -0,0 +1,76 @@
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.db.models import Project, User, project_members
+
+
+def missing_user_ids(db: Session, user_ids) -> list:
+    """The ids in `user_ids` that have no user row (one indexed query)."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return []
+    found = set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+    return sorted(user_ids - found)
+
+
+def lock_project(db: Session, project_id: int, version=None) -> bool:
+    """
+    Bump the project's version before touching its membership.
+
+    The UPDATE takes the project's row lock, so concurrent membership edits of
+    one project apply one after another. Each must then read the membership
+    with a locking read (_current_member_ids): under MySQL's REPEATABLE READ a
+    plain SELECT would still see the snapshot taken before the lock wait. With
+    `version` the bump only happens if the project is still at that version.
+    Returns False when no row matched.
+    """
+    stmt = (
+        update(Project)
+        .where(Project.id == project_id)
+        .values(version=Project.version + 1, updated_at=func.now())
+        .execution_options(synchronize_session='fetch')
+    )
+    if version is not None:
+        stmt = stmt.where(Project.version == version)
+    return db.execute(stmt).rowcount == 1
+
+
+def _current_member_ids(db: Session, project_id: int, user_ids=None) -> set:
+    # FOR UPDATE reads the latest committed rows, not the transaction's snapshot
+    stmt = select(project_members.c.user_id).where(project_members.c.project_id == project_id)
+    if user_ids is not None:
+        stmt = stmt.where(project_members.c.user_id.in_(user_ids))
+    return set(db.scalars(stmt.with_for_update()))
+
+
+def _write_diff(db: Session, project_id: int, added, removed):
+    if added:
+        db.execute(insert(project_members), [{'project_id': project_id, 'user_id': uid} for uid in added])
+    if removed:
+        db.execute(
+            delete(project_members)
+            .where(project_members.c.project_id == project_id, project_members.c.user_id.in_(removed))
+        )
+    return added, removed
+
+
+def change_members(db: Session, project_id: int, add=(), remove=()):
+    """
+    Apply a membership diff with at most three statements, however large the
+    project: one SELECT of the touched ids, one INSERT, one DELETE.
+
+    Ids already in (or already out of) the project are skipped. Call after
+    lock_project in the same transaction. Returns the (added, removed) ids
+    that actually changed.
+    """
+    add, remove = set(add), set(remove)
+    if not add and not remove:
+        return [], []
+    current = _current_member_ids(db, project_id, add | remove)
+    return _write_diff(db, project_id, sorted(add - current), sorted(remove & current))
+
+
+def set_members(db: Session, project_id: int, user_ids):
+    """Make the membership exactly `user_ids`, writing only the difference."""
+    user_ids = set(user_ids)
+    current = _current_member_ids(db, project_id)
+    return _write_diff(db, project_id, sorted(user_ids - current), sorted(current - user_ids))
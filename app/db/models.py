@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Boolean, Table
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Boolean, Table, Index, DDL, event, text
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import false, func
 from app.db.database import Base
 import enum
 
@@ -9,7 +9,10 @@ project_members = Table(
     'project_members',
     Base.metadata,
     Column('project_id', Integer, ForeignKey('projects.id', ondelete='CASCADE')),
-    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'))
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE')),
+    # Both directions: a project's members, and the projects a user belongs to
+    Index('ux_project_members_project_user', 'project_id', 'user_id', unique=True),
+    Index('ix_project_members_user_project', 'user_id', 'project_id'),
 )
 
 # Enum for user roles
@@ -51,15 +54,33 @@ class User(Base):
 # Project model
 class Project(Base):
     __tablename__ = 'projects'
+    __table_args__ = (
+        Index('ix_projects_created_id', 'created_at', 'id'),  # keyset pagination
+        # Default listings only show active projects (app.db.archive.ACTIVE_PROJECT);
+        # MySQL has no partial indexes and keeps using the one above
+        Index(
+            'ix_projects_active_created_id', 'created_at', 'id',
+            sqlite_where=text('is_archived = 0'), postgresql_where=text('NOT is_archived'),
+        ).ddl_if(callable_=lambda ddl, target, bind, **kw: bind.dialect.name in ('sqlite', 'postgresql')),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    is_archived = Column(Boolean, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    is_archived = Column(Boolean, default=False, server_default=false())
+    # Incremented by every UPDATE, which also checks it (optimistic locking, ETags)
+    version = Column(Integer, nullable=False, default=1, server_default='1')
 
-    members = relationship('User', secondary=project_members, back_populates='projects')
-    tasks = relationship('Task', back_populates='project', cascade='all, delete')
+    __mapper_args__ = {'version_id_col': version}
+
+    # passive_deletes: deleting a project is one DELETE; the foreign keys' ON DELETE
+    # CASCADE removes members, tasks, comments, counters and archived rows
+    members = relationship('User', secondary=project_members, back_populates='projects', passive_deletes=True)
+    tasks = relationship('Task', back_populates='project', cascade='all, delete', passive_deletes=True)
+    # Written only by app.db.archive
+    archived_tasks = relationship('ArchivedTask', viewonly=True)
 
     # ✅ Add this property
     @property
@@ -67,9 +88,30 @@ class Project(Base):
         """Return a list of member IDs for this project."""
         return [member.id for member in self.members]
 
+    @property
+    def all_tasks(self) -> list:
+        """Tasks in either tier; while the archive job runs a project has some in each."""
+        return list(self.tasks) + list(self.archived_tasks)
+
 # Task model
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Keyset pages: all tasks, per project, per assignee
+        Index('ix_tasks_created_id', 'created_at', 'id'),
+        Index('ix_tasks_project_created_id', 'project_id', 'created_at', 'id'),
+        Index('ix_tasks_assignee_created_id', 'assignee_id', 'created_at', 'id'),
+        # Membership/access checks: tasks of a user within a project
+        Index('ix_tasks_assignee_project', 'assignee_id', 'project_id'),
+        # Per-project status aggregates (counter rebuilds, progress)
+        Index('ix_tasks_project_status', 'project_id', 'status'),
+        # Overdue scans: due_date < now AND status != 'done'
+        Index('ix_tasks_due_date_status', 'due_date', 'status'),
+        # Search (app.db.search); SQLite uses the tasks_fts table below instead
+        Index('ft_tasks_title_description', 'title', 'description', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        # Never hand out an id again: archived rows keep theirs and may be restored
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -77,17 +119,26 @@ class Task(Base):
     status = Column(Enum(TaskStatus), default=TaskStatus.todo)
     due_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default='1')
 
     project_id = Column(Integer, ForeignKey('projects.id', ondelete='CASCADE'))
     assignee_id = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
 
     project = relationship('Project', back_populates='tasks')
     assignee = relationship('User', back_populates='assigned_tasks')
-    comments = relationship('Comment', back_populates='task', cascade='all, delete')
+    comments = relationship('Comment', back_populates='task', cascade='all, delete', passive_deletes=True)
+
+    __mapper_args__ = {'version_id_col': version}
 
 # Comment model
 class Comment(Base):
     __tablename__ = 'comments'
+    __table_args__ = (
+        Index('ix_comments_task_created_id', 'task_id', 'created_at', 'id'),
+        Index('ft_comments_content', 'content', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
@@ -98,3 +149,76 @@ class Comment(Base):
 
     task = relationship('Task', back_populates='comments')
     author = relationship('User')
+
+# Cold tier: tasks and comments of archived projects, moved out of the hot
+# tables by app.db.archive with their ids and columns unchanged. Only the
+# lookups needed to restore or show a project are indexed.
+class ArchivedTask(Base):
+    __tablename__ = 'archived_tasks'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String(255), nullable=False)
+    description = Column(Text)
+    status = Column(Enum(TaskStatus), default=TaskStatus.todo)
+    due_date = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete='CASCADE'), index=True)
+    assignee_id = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+
+
+class ArchivedComment(Base):
+    __tablename__ = 'archived_comments'
+
+    id = Column(Integer, primary_key=True)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+
+    task_id = Column(Integer, ForeignKey('archived_tasks.id', ondelete='CASCADE'), index=True)
+    author_id = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'))
+
+# Per-project task counts by status, kept in step with `tasks` by app.db.counters
+class ProjectTaskCounter(Base):
+    __tablename__ = 'project_task_counters'
+
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    status = Column(Enum(TaskStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+# SQLite full-text search: external-content FTS5 tables kept in step with
+# tasks/comments by triggers, so the text itself is stored only once.
+# All statements are idempotent; scripts/migrate_db.py replays them on old databases.
+SQLITE_FTS_DDL = {
+    'tasks': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+        # Only text edits touch the index; status changes and version bumps do not
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    ],
+    'comments': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5("
+        "content, content='comments', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN "
+        "INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN "
+        "INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+        "CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE OF content ON comments BEGIN "
+        "INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+        "INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content); END",
+    ],
+}
+
+for _model in (Task, Comment):
+    _table = _model.__table__
+    for _statement in SQLITE_FTS_DDL[_table.name]:
+        event.listen(_table, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    # Dropping the table drops its triggers, but not the FTS table
+    event.listen(_table, 'after_drop', DDL(f'DROP TABLE IF EXISTS {_table.name}_fts').execute_if(dialect='sqlite'))
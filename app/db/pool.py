@@ -0,0 +1,108 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+
+class PoolStats:
+    """Counters for one engine's connection pool: checkout waits and connection churn."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            if timed_out:
+                self.timeouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def attach(self, engine):
+        # Listening on the engine (not engine.pool) survives engine.dispose()
+        pool_target = engine
+        event.listen(pool_target, 'connect', lambda *a: self.incr('connects'))
+        event.listen(pool_target, 'checkout', lambda *a: self.incr('checkouts'))
+        event.listen(pool_target, 'checkin', lambda *a: self.incr('checkins'))
+        event.listen(pool_target, 'close', lambda *a: self.incr('closes'))
+        event.listen(pool_target, 'invalidate', lambda *a: self.incr('invalidations'))
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            waits = self.waits
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "closes": self.closes,
+                "invalidations": self.invalidations,
+                "wait_avg_ms": round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+        # Live gauges only exist on QueuePool-style pools
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+def _instrumented(pool_cls):
+    class InstrumentedPool(pool_cls):
+        """Times every checkout, including time spent queued for a free connection."""
+
+        stats: PoolStats = None
+
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                conn = super().connect()
+            except PoolTimeoutError:
+                self.stats.record_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            self.stats.record_wait(time.perf_counter() - started)
+            return conn
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_cls.__name__}"
+    return InstrumentedPool
+
+
+def engine_options(url: str, stats: PoolStats, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine/create_async_engine built from Settings."""
+    options = {"echo": settings.DB_ECHO}
+    # SQLite has no server connections worth pooling; keep its default pool
+    if make_url(url).get_backend_name() == 'sqlite':
+        return options
+    pool_cls = _instrumented(AsyncAdaptedQueuePool if is_async else QueuePool)
+    pool_cls.stats = stats
+    options.update(
+        poolclass=pool_cls,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+    return options
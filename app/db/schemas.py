@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, field_serializer
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_serializer
+from typing import Literal, Optional, List
 from datetime import datetime
 import enum
 
@@ -23,8 +23,7 @@ class RoleOut(BaseModel):
     id: int
     name: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserOut(BaseModel):
@@ -33,8 +32,7 @@ class UserOut(BaseModel):
     email: str
     role: RoleOut     # <-- changed from str to RoleOut
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserLogin(BaseModel):
     username: str
@@ -55,8 +53,11 @@ class ProjectOut(BaseModel):
     created_at: datetime
     member_ids: List[int]
 
-    class Config:
-        from_attributes = True  # ✅ Pydantic v2 equivalent of orm_mode
+    model_config = ConfigDict(from_attributes=True)
+
+class ProjectPage(BaseModel):
+    items: List[ProjectOut]
+    next_cursor: Optional[str] = None
 
 class ProjectMember(BaseModel):
     id: int
@@ -64,8 +65,7 @@ class ProjectMember(BaseModel):
     email: str
     role: RoleOut
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TaskMini(BaseModel):
@@ -75,16 +75,15 @@ class TaskMini(BaseModel):
     assignee_id: Optional[int]
     due_date: Optional[datetime]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProjectDetail(ProjectOut):
     members: List[ProjectMember]
-    tasks: List[TaskMini]
+    # Hot and archived tasks alike (Project.all_tasks)
+    tasks: List[TaskMini] = Field(validation_alias='all_tasks')
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProjectUpdate(BaseModel):
@@ -93,14 +92,35 @@ class ProjectUpdate(BaseModel):
     member_ids: Optional[List[int]] = None
 
 
+class ProjectMembersPatch(BaseModel):
+    add: List[int] = []
+    remove: List[int] = []
+
+
+class ProjectMembersChange(BaseModel):
+    project_id: int
+    added: List[int]
+    removed: List[int]
+
+
+class ProjectDeletionJob(BaseModel):
+    id: str
+    project_id: int
+    status: Literal['running', 'done', 'failed']
+    total_tasks: int
+    deleted_tasks: int
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+
 class ProjectProgress(BaseModel):
     project_id: int
     total_tasks: int
     completed_tasks: int
     completion_percent: float
     
-    class Config:
-        from_attributes = True  # <-- This enables from_orm in Pydantic v2
+    model_config = ConfigDict(from_attributes=True)
 
 # ------------------ Task Schemas ------------------
 class TaskBase(BaseModel):
@@ -112,14 +132,45 @@ class TaskCreate(TaskBase):
     assignee_id: Optional[int] = None
     project_id: int
 
+class TaskBulkCreate(BaseModel):
+    tasks: List[TaskCreate]
+
+class TaskBulkOut(BaseModel):
+    created: int
+    ids: List[int]
+
 class TaskOut(TaskBase):
     id: int
     status: str
     project_id: int
     assignee_id: Optional[int]
     created_at: datetime
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TaskPage(BaseModel):
+    items: List[TaskOut]
+    next_cursor: Optional[str] = None
+
+class TaskStatusOut(BaseModel):
+    ok: bool
+    status: str
+
+class TaskDeadlineOut(BaseModel):
+    ok: bool
+    task_id: int
+    due_date: Optional[datetime]
+
+class TaskExportRow(BaseModel):
+    id: int
+    title: str
+    status: str
+    due_date: Optional[datetime]
+    project_id: int
+    assignee_id: Optional[int]
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
 
 class TaskUpdate(BaseModel):
     title: Optional[str]
@@ -136,8 +187,7 @@ class AuthorMini(BaseModel):
     id: int
     username: str
 
-    class Config:
-        from_attributes = True  # or orm_mode = True for Pydantic v1
+    model_config = ConfigDict(from_attributes=True)
 
 class CommentOut(BaseModel):
     id: int
@@ -146,8 +196,61 @@ class CommentOut(BaseModel):
     task_id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class CommentPage(BaseModel):
+    items: List[CommentOut]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+# ------------------ Search Schemas ------------------
+class SearchHit(BaseModel):
+    type: Literal['task', 'comment']
+    id: int
+    task_id: int
+    project_id: int
+    title: str              # the task's title, for comment hits too
+    snippet: Optional[str] = None
+    score: float
+
+class SearchResults(BaseModel):
+    items: List[SearchHit]
+    has_more: bool = False
+
+# ------------------ Reporting Schemas ------------------
+class StatusShare(BaseModel):
+    count: int
+    percent: float
+
+class TaskCounts(BaseModel):
+    todo: Optional[StatusShare] = None
+    in_progress: Optional[StatusShare] = None
+    done: Optional[StatusShare] = None
+    total_tasks: int
+
+class ProjectProgressReport(BaseModel):
+    project_id: int
+    total_tasks: int
+    todo: int
+    in_progress: int
+    done: int
+    progress_percent: float
+
+class OverdueProjectCount(BaseModel):
+    project_id: int
+    project_title: str
+    overdue_tasks: int
+
+class SummaryTotals(BaseModel):
+    projects: int
+    tasks: int
+    users: int
+
+class SummaryReport(BaseModel):
+    totals: SummaryTotals
+    completed_tasks: int
+    overdue_tasks: int
+    overall_progress_percent: float
 
 # ------------------ Token Schema ------------------
 class Token(BaseModel):
@@ -0,0 +1,86 @@
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.dialects.mysql import match
+
+from app.db.models import Comment, Task
+
+SUPPORTED_DIALECTS = ('sqlite', 'mysql')
+MAX_TERMS = 8
+# Title hits outrank description hits (FTS5 bm25 column weights)
+TITLE_WEIGHT = 4.0
+
+tasks_fts = table('tasks_fts', column('rowid'))
+comments_fts = table('comments_fts', column('rowid'))
+
+
+def search_terms(q: str) -> list:
+    """Plain words of the query; operators and punctuation are never passed through."""
+    return re.findall(r'\w+', q.lower())[:MAX_TERMS]
+
+
+def match_expression(dialect: str, terms: list) -> str:
+    """All terms must match; the last one as a prefix, so partial words find results as you type."""
+    if dialect == 'sqlite':
+        return ' '.join(f'"{t}"' for t in terms) + '*'
+    return ' '.join(f'+{t}' for t in terms) + '*'
+
+
+def _visible(stmt, developer_id: Optional[int], project_id: Optional[int]):
+    # Same scoping as list_tasks: developers only see their own tasks (and their comments)
+    if developer_id is not None:
+        stmt = stmt.where(Task.assignee_id == developer_id)
+    if project_id is not None:
+        stmt = stmt.where(Task.project_id == project_id)
+    return stmt
+
+
+def task_search(dialect: str, terms: list, developer_id: Optional[int] = None, project_id: Optional[int] = None):
+    """SELECT of (id, title, description, project_id, score) for matching tasks, best first."""
+    expression = match_expression(dialect, terms)
+    if dialect == 'sqlite':
+        # bm25 is lower-is-better; negate so both dialects rank by descending score
+        score = (-func.bm25(literal_column('tasks_fts'), TITLE_WEIGHT, 1.0)).label('score')
+        stmt = (
+            select(Task.id, Task.title, Task.description, Task.project_id, score)
+            .select_from(tasks_fts)
+            .join(Task, Task.id == tasks_fts.c.rowid)
+            .where(literal_column('tasks_fts').op('MATCH')(expression))
+        )
+    else:
+        relevance = match(Task.title, Task.description, against=expression).in_boolean_mode()
+        score = relevance.label('score')
+        stmt = select(Task.id, Task.title, Task.description, Task.project_id, score).where(relevance)
+    return _visible(stmt, developer_id, project_id).order_by(score.desc(), Task.id.desc())
+
+
+def comment_search(dialect: str, terms: list, developer_id: Optional[int] = None, project_id: Optional[int] = None):
+    """SELECT of (id, content, task_id, task title, project_id, score) for matching comments, best first."""
+    expression = match_expression(dialect, terms)
+    columns = (Comment.id, Comment.content, Comment.task_id, Task.title, Task.project_id)
+    if dialect == 'sqlite':
+        score = (-func.bm25(literal_column('comments_fts'))).label('score')
+        stmt = (
+            select(*columns, score)
+            .select_from(comments_fts)
+            .join(Comment, Comment.id == comments_fts.c.rowid)
+            .where(literal_column('comments_fts').op('MATCH')(expression))
+        )
+    else:
+        relevance = match(Comment.content, against=expression).in_boolean_mode()
+        score = relevance.label('score')
+        stmt = select(*columns, score).where(relevance)
+    stmt = stmt.join(Task, Task.id == Comment.task_id)
+    return _visible(stmt, developer_id, project_id).order_by(score.desc(), Comment.id.desc())
+
+
+def snippet(text: Optional[str], terms: list, width: int = 160) -> Optional[str]:
+    """Excerpt of `text` around the first matched term."""
+    if not text:
+        return None
+    lower = text.lower()
+    hits = [pos for pos in (lower.find(term) for term in terms) if pos >= 0]
+    start = max(min(hits, default=0) - width // 4, 0)
+    end = start + width
+    return ('…' if start else '') + text[start:end].strip() + ('…' if end < len(text) else '')
@@ -0,0 +1,29 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app.db.models import Project, project_members
+
+
+def bump_project_versions(db: Session, project_ids):
+    """
+    Invalidate the ETag of projects whose detail view changed without their own
+    row changing (task writes, member profile edits).
+
+    `project_ids` may be a list of ids or a SELECT of ids. Matching Project
+    objects already in the session get the new version too, so their own
+    version-checked UPDATEs keep working.
+    """
+    if isinstance(project_ids, (list, tuple, set)):
+        project_ids = [pid for pid in set(project_ids) if pid is not None]
+        if not project_ids:
+            return
+    db.execute(
+        update(Project)
+        .where(Project.id.in_(project_ids))
+        .values(version=Project.version + 1, updated_at=func.now())
+        .execution_options(synchronize_session='fetch')
+    )
+
+
+def bump_member_projects(db: Session, user_id: int):
+    """A member's profile is part of every ProjectDetail they appear in."""
+    bump_project_versions(db, select(project_members.c.project_id).where(project_members.c.user_id == user_id))
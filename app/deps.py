@@ -1,13 +1,36 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, joinedload, object_session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import timed
+from app.db.database import get_db, get_async_db
 from app.db import models
-from app.security.jwt import decode_access_token
+from app.security.jwt import decode_access_token, evict_user_tokens
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/api/auth/token')
 
-def get_current_user(token:str=Depends(oauth2_scheme), db:Session=Depends(get_db)):
+# Detached User rows (with their role loaded), keyed by user_id
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+def invalidate_principal(user_id:int):
+    principal_cache.invalidate(user_id)
+
+@event.listens_for(models.User, 'after_update')
+def _evict_changed_user(mapper, connection, target):
+    # Covers profile edits and deactivation no matter which code path flushes them;
+    # collection-only changes (project membership, assignments) keep the entry.
+    if object_session(target).is_modified(target, include_collections=False):
+        invalidate_principal(target.id)
+        evict_user_tokens(target.id)
+
+@event.listens_for(models.User, 'after_delete')
+def _evict_deleted_user(mapper, connection, target):
+    invalidate_principal(target.id)
+    evict_user_tokens(target.id)
+
+def _user_id_from_token(token:str):
     try:
         payload=decode_access_token(token)
     except Exception:
@@ -15,7 +38,48 @@ def get_current_user(token:str=Depends(oauth2_scheme), db:Session=Depends(get_db
     user_id=payload.get('user_id')
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate token')
-    user=db.query(models.User).filter(models.User.id==user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found')
-    return user
+    return user_id
+
+def _detach(db, user:models.User):
+    # expunge does not cascade to role, which would otherwise be expired by that
+    # session's next commit and lazily reloaded on every cache hit
+    if user.role is not None:
+        db.expunge(user.role)
+    db.expunge(user)
+
+def _check_active(user:models.User):
+    if user.is_active is False:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Inactive user')
+
+def get_current_user(token:str=Depends(oauth2_scheme), db:Session=Depends(get_db)):
+    with timed('auth'):
+        user_id=_user_id_from_token(token)
+        cached=principal_cache.get(user_id)
+        if cached is None:
+            user=db.query(models.User).options(joinedload(models.User.role)).filter(models.User.id==user_id).first()
+            if not user:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found')
+            # Keep a detached snapshot in the cache; the request gets its own attached copy
+            _detach(db, user)
+            principal_cache.set(user_id, user)
+            cached=user
+        _check_active(cached)
+        # load=False attaches the copy (and its role) without emitting any SQL
+        return db.merge(cached, load=False)
+
+async def get_current_user_async(token:str=Depends(oauth2_scheme), db=Depends(get_async_db)):
+    with timed('auth'):
+        user_id=_user_id_from_token(token)
+        cached=principal_cache.get(user_id)
+        if cached is None:
+            result=await db.execute(
+                select(models.User).options(joinedload(models.User.role)).where(models.User.id==user_id)
+            )
+            user=result.scalars().first()
+            if not user:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found')
+            _detach(db, user)
+            principal_cache.set(user_id, user)
+            cached=user
+        _check_active(cached)
+        return await db.merge(cached, load=False)
@@ -1,11 +1,29 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 from app.api.router import router as api_router
 from app.db import models
 from app.db.database import engine
+from app.core.config import settings
+from app.core.metrics import RequestMetricsMiddleware
+from app.security.passwords import password_hasher
+from app.security.roles import role_registry
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Project Management API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes are a deploy step (scripts/create_db.py, scripts/migrate_db.py);
+    # workers only run DDL when explicitly asked to, e.g. for a local dev database
+    if settings.CREATE_TABLES_ON_STARTUP:
+        models.Base.metadata.create_all(bind=engine)
+    # Authorization reads roles from memory; load them before the first request
+    role_registry.load()
+    yield
+    password_hasher.shutdown()
+
+app = FastAPI(title="Project Management API", version="0.1.0", lifespan=lifespan)
 
 # CORS for React dev server
 app.add_middleware(
@@ -14,13 +32,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# SQL statement counts, DB time and Server-Timing for every request
+if settings.REQUEST_METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
+# Async read path goes first so its GET routes shadow the sync ones
+if settings.ASYNC_DATABASE_URL:
+    from app.api.async_router import router as async_api_router
+    app.include_router(async_api_router, prefix="/api", include_in_schema=False)
+
 # Include your API router
 app.include_router(api_router, prefix="/api")
 
-# ✅ Create all tables
-models.Base.metadata.create_all(bind=engine)
+# Versioned rows (Project, Task) changed by someone else between read and write
+@app.exception_handler(StaleDataError)
+def concurrent_update_handler(request, exc):
+    return JSONResponse(status_code=409, content={"detail": "Resource was modified concurrently, retry"})
 
 @app.get("/health")
 def health():
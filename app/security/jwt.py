@@ -1,13 +1,75 @@
 from datetime import datetime, timedelta
+import hashlib
+import threading
+import time
 import jwt
+from app.core.cache import ExpiringSet, TTLCache
 from app.core.config import settings
 SECRET_KEY=settings.SECRET_KEY
 ALGORITHM=settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+
+# Already-verified payloads keyed by token digest; each entry expires at the token's exp
+verified_tokens=TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=int(ACCESS_TOKEN_EXPIRE_MINUTES)*60)
+# Logged-out tokens, kept until their own exp and never evicted before it
+revoked_tokens=ExpiringSet(maxsize=settings.REVOKED_TOKENS_MAX)
+# Bumping a user's generation invalidates every cached entry of theirs at once
+_user_generations={}
+_lock=threading.Lock()
+
+class RevokedTokenError(jwt.InvalidTokenError):
+    pass
+
+class RevocationListFull(Exception):
+    pass
+
+def _digest(token:str):
+    return hashlib.sha256(token.encode()).digest()
+
+def _generation(user_id):
+    with _lock:
+        return _user_generations.get(user_id, 0)
+
 def create_access_token(data:dict):
     to_encode=data.copy()
     expire=datetime.utcnow()+timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({'exp':expire})
     return jwt.encode(to_encode,SECRET_KEY,algorithm=ALGORITHM)
+
 def decode_access_token(token:str):
-    return jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
+    key=_digest(token)
+    if key in revoked_tokens:
+        raise RevokedTokenError('Token has been revoked')
+    entry=verified_tokens.get(key)
+    if entry is not None:
+        generation,payload=entry
+        if generation==_generation(payload.get('user_id')):
+            return dict(payload)
+    payload=jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
+    generation=_generation(payload.get('user_id'))
+    remaining=payload['exp']-time.time() if 'exp' in payload else None
+    if remaining is None or remaining>0:
+        verified_tokens.set(key,(generation,payload),ttl=remaining)
+    return dict(payload)
+
+def revoke_token(token:str):
+    """
+    Logout: reject this token from now on (in this process) and drop its cached entry.
+    Raises RevocationListFull when the denylist has no room left before the token's exp.
+    """
+    key=_digest(token)
+    try:
+        payload=jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
+    except jwt.InvalidTokenError:
+        verified_tokens.invalidate(key)
+        return
+    remaining=payload['exp']-time.time() if 'exp' in payload else None
+    if remaining is None or remaining>0:
+        if not revoked_tokens.add(key,ttl=remaining):
+            raise RevocationListFull('Too many revoked tokens')
+    verified_tokens.invalidate(key)
+
+def evict_user_tokens(user_id:int):
+    """Force every token of this user to be fully re-verified (deactivation, role changes)."""
+    with _lock:
+        _user_generations[user_id]=_user_generations.get(user_id, 0)+1
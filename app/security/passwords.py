@@ -0,0 +1,160 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import settings
+from app.core.metrics import record_segment
+
+
+@functools.lru_cache(maxsize=None)
+def pwd_context():
+    # passlib (and the bcrypt backend) load on first use, not at app import:
+    # only the hashing processes, or inline hashing, ever need them
+    from passlib.context import CryptContext
+    # Hashes made with a different bcrypt cost report needs_update, which drives rehash-on-login
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when every hashing worker and queue slot is taken."""
+
+
+# Executed inside the worker processes, so they must stay module-level (picklable)
+def _hash(password: str) -> str:
+    return pwd_context().hash(password)
+
+def _verify_and_update(password: str, hashed: str):
+    return pwd_context().verify_and_update(password, hashed)
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so a burst of logins cannot starve
+    the request threadpool: async callers await the pool's futures on the
+    event loop and hold no thread while hashing or queued. At most `workers + queue_depth` calls may be in
+    flight; beyond that calls fail fast with PasswordHasherBusy. workers=0
+    hashes inline (useful for scripts and local runs).
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_depth)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.hash_total = 0.0
+        self.hash_max = 0.0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a multi-threaded server process is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self.in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _record(self, submitted: float, hash_time: float):
+        elapsed = time.perf_counter() - submitted
+        wait_time = max(elapsed - hash_time, 0.0)
+        record_segment('hash', elapsed)
+        with self._lock:
+            self.calls += 1
+            self.hash_total += hash_time
+            self.hash_max = max(self.hash_max, hash_time)
+            self.wait_total += wait_time
+            self.wait_max = max(self.wait_max, wait_time)
+
+    def _run(self, fn, *args):
+        """Blocking call, for scripts and other sync callers."""
+        self._acquire()
+        try:
+            submitted = time.perf_counter()
+            if self.workers <= 0:
+                result, hash_time = _timed(fn, *args)
+            else:
+                result, hash_time = self._get_executor().submit(_timed, fn, *args).result()
+            self._record(submitted, hash_time)
+            return result
+        finally:
+            self._release()
+
+    async def _run_async(self, fn, *args):
+        """Awaits the pool on the event loop, so waiting holds no thread at all."""
+        self._acquire()
+        try:
+            submitted = time.perf_counter()
+            if self.workers <= 0:
+                # Inline hashing still must not block the event loop
+                result, hash_time = await asyncio.to_thread(_timed, fn, *args)
+            else:
+                result, hash_time = await asyncio.wrap_future(self._get_executor().submit(_timed, fn, *args))
+            self._record(submitted, hash_time)
+            return result
+        finally:
+            self._release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify_and_update(self, password: str, hashed: str):
+        """Return (valid, new_hash); new_hash is set when the stored hash uses outdated settings."""
+        return self._run(_verify_and_update, password, hashed)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(_hash, password)
+
+    async def verify_and_update_async(self, password: str, hashed: str):
+        return await self._run_async(_verify_and_update, password, hashed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.calls
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "calls": calls,
+                "rejected": self.rejected,
+                "hash_avg_ms": round(self.hash_total / calls * 1000, 3) if calls else 0.0,
+                "hash_max_ms": round(self.hash_max * 1000, 3),
+                "queue_wait_avg_ms": round(self.wait_total / calls * 1000, 3) if calls else 0.0,
+                "queue_wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_depth=settings.PASSWORD_HASH_QUEUE_DEPTH,
+)
@@ -0,0 +1,132 @@
+import enum
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.db import models
+from app.db.database import SessionLocal
+from app.db.models import RoleEnum
+
+logger = logging.getLogger(__name__)
+
+
+class Permission(str, enum.Enum):
+    manage_projects = 'manage_projects'      # create, update, archive projects
+    delete_projects = 'delete_projects'
+    view_all_projects = 'view_all_projects'  # not limited to projects one belongs to
+    manage_tasks = 'manage_tasks'            # create, edit, reassign, delete tasks
+    view_all_tasks = 'view_all_tasks'        # not limited to tasks assigned to oneself
+    moderate_comments = 'moderate_comments'  # delete other people's comments
+    view_reports = 'view_reports'
+    manage_users = 'manage_users'
+    view_system = 'view_system'              # runtime stats and metrics
+
+
+ROLE_PERMISSIONS = {
+    RoleEnum.admin: frozenset(Permission),
+    RoleEnum.manager: frozenset({
+        Permission.manage_projects, Permission.view_all_projects,
+        Permission.manage_tasks, Permission.view_all_tasks, Permission.view_reports,
+    }),
+    RoleEnum.developer: frozenset(),
+}
+
+
+# Roles are seeded out of band (SQL, scripts, other workers), so the registry
+# also reloads on an unknown role_id (at most this often) and when it gets old
+ROLE_MISS_RELOAD_SECONDS = 5
+ROLE_REGISTRY_TTL_SECONDS = 300
+
+
+class RoleRegistry:
+    """
+    role_id -> RoleEnum for the `roles` table, which is tiny and almost never
+    changes. Loaded once (at startup or on first use) and reloaded after any
+    committed change to a Role row made through this process's sessions, so
+    authorization almost never queries it.
+
+    Changes made elsewhere (raw SQL, scripts, other workers) are only picked
+    up by the fallbacks: a lookup of an unknown role_id reloads at most every
+    ROLE_MISS_RELOAD_SECONDS, and any lookup reloads once the registry is
+    older than ROLE_REGISTRY_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self._roles = None  # role_id -> RoleEnum; None until loaded or after a change
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db=None):
+        own_session = db is None
+        db = SessionLocal() if own_session else db
+        try:
+            rows = db.query(models.Role.id, models.Role.name).all()
+        finally:
+            if own_session:
+                db.close()
+        roles = {}
+        for role_id, name in rows:
+            try:
+                roles[role_id] = RoleEnum(name)
+            except ValueError:
+                # Users with an unknown role get no permissions
+                logger.warning("Ignoring unknown role %r (id=%s)", name, role_id)
+        with self._lock:
+            self._roles = roles
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._roles = None
+
+    def _current(self) -> dict:
+        roles = self._roles
+        if roles is None or time.monotonic() - self._loaded_at > ROLE_REGISTRY_TTL_SECONDS:
+            self.load()
+            roles = self._roles or {}
+        return roles
+
+    def role(self, role_id: Optional[int]) -> Optional[RoleEnum]:
+        roles = self._current()
+        if role_id is not None and role_id not in roles:
+            with self._lock:
+                stale = time.monotonic() - self._loaded_at > ROLE_MISS_RELOAD_SECONDS
+                if stale:
+                    # Claim the reload so concurrent misses do not all query
+                    self._loaded_at = time.monotonic()
+            if stale:
+                self.load()
+                roles = self._roles or {}
+        return roles.get(role_id)
+
+    def permissions(self, role_id: Optional[int]) -> frozenset:
+        role = self.role(role_id)
+        return ROLE_PERMISSIONS.get(role, frozenset())
+
+
+role_registry = RoleRegistry()
+
+
+def can(user: models.User, permission: Permission) -> bool:
+    """O(1) permission check from the user's role_id; never touches the database."""
+    return permission in role_registry.permissions(user.role_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _reload_after_role_change(session):
+    if session.info.pop('roles_changed', False):
+        role_registry.invalidate()
+
+
+@event.listens_for(models.Role, 'after_insert')
+@event.listens_for(models.Role, 'after_update')
+@event.listens_for(models.Role, 'after_delete')
+def _mark_roles_changed(mapper, connection, target):
+    # Applied once the transaction commits; a rolled-back change leaves the registry alone
+    session = object_session(target)
+    if session is not None:
+        session.info['roles_changed'] = True
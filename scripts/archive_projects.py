@@ -0,0 +1,34 @@
+import argparse
+from app.core.config import settings
+from app.db.archive import pending_project_ids, sync_project_tier
+from app.db.database import SessionLocal
+
+# Moves tasks and comments to the tier matching their project's is_archived
+# flag: archived projects into archived_tasks/archived_comments, un-archived
+# ones back. Toggling a project already does this in the background; run this
+# after a restart or failure, or after archiving projects directly in the
+# database. Safe to re-run.
+# Usage: python -m scripts.archive_projects [--project ID ...] [--batch-size N] [--dry-run]
+parser = argparse.ArgumentParser()
+parser.add_argument('--project', type=int, nargs='*', help='only these projects (default: every project with misplaced tasks)')
+parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+parser.add_argument('--dry-run', action='store_true', help='only list the projects that need moving')
+args = parser.parse_args()
+
+if args.project:
+    project_ids = args.project
+else:
+    db = SessionLocal()
+    try:
+        project_ids = pending_project_ids(db)
+    finally:
+        db.close()
+
+print(f'{len(project_ids)} projects to move')
+for project_id in project_ids:
+    if args.dry_run:
+        print(f'project {project_id}')
+        continue
+    moved = sync_project_tier(project_id, batch_size=args.batch_size)
+    print(f'project {project_id}: moved {moved} tasks')
+print('Done')
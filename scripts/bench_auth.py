@@ -0,0 +1,72 @@
+"""
+Measure the per-request cost of authentication: JWT verification alone, and
+the whole get_current_user dependency, with the verified-token and principal
+caches cold (every call re-verifies and re-queries) versus warm.
+
+Usage:
+    python -m scripts.bench_auth [--iterations N]
+
+Runs against a throwaway in-memory SQLite database.
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db import models
+from app.db.database import Base
+from app.deps import get_current_user, principal_cache
+from app.security.jwt import create_access_token, decode_access_token, verified_tokens
+
+
+def _per_call_us(fn, iterations, before_each=None):
+    elapsed = 0.0
+    for _ in range(iterations):
+        if before_each:
+            before_each()
+        started = time.perf_counter()
+        fn()
+        elapsed += time.perf_counter() - started
+    return elapsed / iterations * 1_000_000
+
+
+def _cold():
+    verified_tokens.clear()
+    principal_cache.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Role), [{'name': r.value} for r in models.RoleEnum])
+        conn.execute(insert(models.User), [
+            {'username': 'bench', 'email': 'bench@example.com', 'hashed_password': 'x', 'role_id': 3}
+        ])
+    token = create_access_token({'user_id': 1, 'username': 'bench', 'role': 'developer'})
+
+    with Session(engine) as db:
+        def current_user():
+            get_current_user(token, db)
+            db.expunge_all()
+
+        results = [
+            ('decode_access_token', _per_call_us(lambda: decode_access_token(token), args.iterations, _cold),
+             _per_call_us(lambda: decode_access_token(token), args.iterations)),
+            ('get_current_user', _per_call_us(current_user, args.iterations, _cold),
+             _per_call_us(current_user, args.iterations)),
+        ]
+
+    print(f"{'':<22}{'cold (us)':>12}{'cached (us)':>14}{'speedup':>10}")
+    for name, cold, warm in results:
+        print(f'{name:<22}{cold:>12.2f}{warm:>14.2f}{cold / warm:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Measure worker cold start: how long a fresh process takes to import the app
+and to serve its first requests.
+
+Usage:
+    python -m scripts.bench_cold_start [--runs N] [--budget-ms MS] [--url sqlite:///...]
+
+Each run starts `uvicorn app.main:app` in a new process and polls it, timing
+from process start to the first 200 from /health, from an authenticated
+GET /api/projects/ and from a login (which also starts the password hashing
+processes). Import time alone is measured in a separate process.
+Exits non-zero when the median time to the first /health exceeds --budget-ms
+(default 1500 ms; about 1.4 s on a single-vCPU machine with SQLite).
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+IMPORT_PROBE = 'import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env) -> float:
+    out = subprocess.run([sys.executable, '-c', IMPORT_PROBE], env=env, check=True, capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1]) * 1000
+
+
+def measure_start(env, token, timeout=30.0):
+    import httpx
+
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        # Poll with bare connects: an HTTP client per attempt would compete with
+        # the server for CPU and inflate the very number being measured
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f'server exited: {proc.stderr.read().decode()[-2000:]}')
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError('server did not answer in time')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.01)
+        base = f'http://127.0.0.1:{port}'
+        httpx.get(f'{base}/health', timeout=timeout).raise_for_status()
+        first_health = (time.perf_counter() - started) * 1000
+        response = httpx.get(f'{base}/api/projects/', headers={'Authorization': f'Bearer {token}'}, timeout=timeout)
+        response.raise_for_status()
+        first_api = (time.perf_counter() - started) * 1000
+        response = httpx.post(f'{base}/api/auth/token', json={'username': 'cold', 'password': 'cold'}, timeout=timeout)
+        response.raise_for_status()
+        first_login = (time.perf_counter() - started) * 1000
+        return first_health, first_api, first_login
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def summary(values) -> str:
+    return f'min {min(values):8.1f}  median {statistics.median(values):8.1f}  max {max(values):8.1f} ms'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'pm_cold_start.db'))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help='allowed median time to the first /health')
+    args = parser.parse_args()
+
+    # Schema and a user are prepared here, once: workers must not need DDL to start
+    os.environ['DATABASE_URL'] = args.url
+    from sqlalchemy import insert
+    from app.db import models
+    from app.db.database import engine
+    from app.security.jwt import create_access_token
+    from app.security.passwords import pwd_context
+
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Role), [{'name': r.value} for r in models.RoleEnum])
+        conn.execute(insert(models.User).values(username='cold', email='cold@example.com', hashed_password=pwd_context().hash('cold'), role_id=2))
+    engine.dispose()
+    token = create_access_token({'user_id': 1, 'role': 'manager'})
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+
+    imports, healths, apis, logins = [], [], [], []
+    for _ in range(args.runs):
+        imports.append(measure_import(env))
+        health, api, login = measure_start(env, token)
+        healths.append(health)
+        apis.append(api)
+        logins.append(login)
+
+    print(f'import app.main        {summary(imports)}')
+    print(f'first /health          {summary(healths)}')
+    print(f'first /api/projects/   {summary(apis)}')
+    print(f'first login            {summary(logins)}')
+    median = statistics.median(healths)
+    if median > args.budget_ms:
+        print(f'Cold start budget exceeded: {median:.1f} ms > {args.budget_ms:.0f} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
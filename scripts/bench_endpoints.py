@@ -0,0 +1,400 @@
+"""
+Endpoint benchmark suite: seed a database, drive every route under
+app/api/router in-process and record latency percentiles, throughput and SQL
+statements per request. Results can be saved as a JSON baseline and later runs
+compared against it.
+
+Usage:
+    python -m scripts.bench_endpoints [--url sqlite:///...] [--reuse]
+        [--projects N] [--users N] [--tasks N] [--comments N]
+        [--requests N] [--warmup N] [--routes SUBSTRING ...]
+        [--out results.json] [--save-baseline baseline.json]
+        [--baseline baseline.json] [--threshold 0.25]
+
+Example at full scale (seeding takes a while; re-run later with --reuse):
+    python -m scripts.bench_endpoints --projects 1000 --tasks 1000000 --comments 5000000
+
+With --baseline the run exits non-zero when a route's p95 grows by more than
+--threshold (relative), when it issues more SQL statements per request than
+the baseline, or when it fails requests that used to succeed.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Routes every listed endpoint to a spec below; each spec returns the request to time.
+# Specs may make untimed setup requests first (e.g. create the row a DELETE removes).
+ROUTE_SPECS = {}
+
+
+def spec(method, path):
+    def register(fn):
+        ROUTE_SPECS[(method, path)] = fn
+        return fn
+    return register
+
+
+# ---- auth ----
+@spec('POST', '/api/auth/register')
+def _register(ctx):
+    n = next(ctx.seq)
+    return {'json': {'username': f'bench_new{n}', 'email': f'bench_new{n}@example.com', 'password': 'bench', 'role_id': 3}}
+
+@spec('POST', '/api/auth/token')
+def _login(ctx):
+    return {'json': {'username': 'user1', 'password': ctx.password}}
+
+@spec('POST', '/api/auth/logout')
+def _logout(ctx):
+    return {'headers': ctx.fresh_token(3)}
+
+# ---- users ----
+@spec('GET', '/api/users/me')
+def _me(ctx):
+    return {'headers': ctx.developer}
+
+@spec('PATCH', '/api/users/me')
+def _update_me(ctx):
+    return {'headers': ctx.developer, 'json': {'username': None, 'email': f'dev{next(ctx.seq)}@example.com'}}
+
+@spec('GET', '/api/users/')
+def _list_users(ctx):
+    return {'headers': ctx.admin}
+
+@spec('GET', '/api/users/{user_id}')
+def _get_user(ctx):
+    return {'url': '/api/users/3', 'headers': ctx.admin}
+
+# ---- projects ----
+@spec('POST', '/api/projects/')
+def _create_project(ctx):
+    return {'headers': ctx.manager, 'json': {'title': f'Bench {next(ctx.seq)}', 'member_ids': [3, 4, 5]}}
+
+@spec('GET', '/api/projects/')
+def _list_projects(ctx):
+    return {'headers': ctx.developer, 'params': {'cursor': ctx.project_cursor}}
+
+@spec('GET', '/api/projects/progress')
+def _projects_progress(ctx):
+    return {'headers': ctx.manager}
+
+@spec('GET', '/api/projects/user')
+def _user_projects(ctx):
+    return {'headers': ctx.developer}
+
+@spec('GET', '/api/projects/{project_id}')
+def _get_project(ctx):
+    return {'url': f'/api/projects/{ctx.project_id}', 'headers': ctx.manager}
+
+@spec('GET', '/api/projects/{project_id}/events')
+def _project_events(ctx):
+    # EVENT_STREAM_MAX_SECONDS=0 below: the stream opens and ends at once
+    return {'url': f'/api/projects/{ctx.project_id}/events', 'headers': ctx.developer}
+
+@spec('PUT', '/api/projects/{project_id}')
+def _update_project(ctx):
+    return {'url': f'/api/projects/{ctx.project_id}', 'headers': ctx.manager,
+            'json': {'description': f'Updated {next(ctx.seq)}'}}
+
+@spec('PATCH', '/api/projects/{project_id}/members')
+def _update_project_members(ctx):
+    # Toggle the manager in and out; the developer's membership is left alone
+    change = 'add' if next(ctx.seq) % 2 == 0 else 'remove'
+    return {'url': f'/api/projects/{ctx.project_id}/members', 'headers': ctx.manager, 'json': {change: [2]}}
+
+@spec('DELETE', '/api/projects/{project_id}')
+def _delete_project(ctx):
+    project = ctx.setup('POST', '/api/projects/', headers=ctx.admin, json={'title': 'To delete'})
+    return {'url': f"/api/projects/{project['id']}", 'headers': ctx.admin}
+
+@spec('GET', '/api/projects/deletions/{job_id}')
+def _project_deletion(ctx):
+    # One project just over the synchronous limit, deleted once in the background
+    if getattr(ctx, 'deletion_job', None) is None:
+        from app.core.config import settings
+        project = ctx.setup('POST', '/api/projects/', headers=ctx.manager, json={'title': 'Large delete'})
+        ctx.setup('POST', '/api/tasks/bulk', headers=ctx.manager, json={'tasks': [
+            {'title': f'Doomed {i}', 'project_id': project['id']} for i in range(settings.PROJECT_DELETE_SYNC_MAX_TASKS + 1)
+        ]})
+        ctx.deletion_job = ctx.setup('DELETE', f"/api/projects/{project['id']}", headers=ctx.admin)['id']
+    return {'url': f'/api/projects/deletions/{ctx.deletion_job}', 'headers': ctx.admin}
+
+@spec('PUT', '/api/projects/{project_id}/archive')
+def _archive_project(ctx):
+    # A project of its own: task writes to an archived project get 409
+    project = ctx.setup('POST', '/api/projects/', headers=ctx.manager, json={'title': 'To archive'})
+    return {'url': f"/api/projects/{project['id']}/archive", 'headers': ctx.manager, 'params': {'archive': True}}
+
+# ---- tasks ----
+@spec('POST', '/api/tasks/')
+def _create_task(ctx):
+    return {'headers': ctx.manager, 'json': {'title': 'Bench task', 'project_id': ctx.project_id, 'assignee_id': 3}}
+
+@spec('POST', '/api/tasks/bulk')
+def _bulk_tasks(ctx):
+    return {'headers': ctx.manager, 'json': {'tasks': [
+        {'title': f'Bulk {i}', 'project_id': ctx.project_id, 'assignee_id': 3} for i in range(100)
+    ]}}
+
+@spec('GET', '/api/tasks/')
+def _list_tasks(ctx):
+    return {'headers': ctx.manager, 'params': {'project_id': ctx.project_id}}
+
+@spec('GET', '/api/tasks/overdue')
+def _overdue(ctx):
+    return {'headers': ctx.developer}
+
+@spec('GET', '/api/tasks/{task_id}')
+def _get_task(ctx):
+    return {'url': f'/api/tasks/{ctx.task_id}', 'headers': ctx.manager}
+
+@spec('PUT', '/api/tasks/{task_id}')
+def _update_task(ctx):
+    return {'url': f'/api/tasks/{ctx.task_id}', 'headers': ctx.manager,
+            'json': {'title': None, 'description': f'Updated {next(ctx.seq)}', 'due_date': None, 'assignee_id': None}}
+
+@spec('PUT', '/api/tasks/{task_id}/status')
+def _task_status(ctx):
+    status = ('todo', 'in_progress', 'done')[next(ctx.seq) % 3]
+    return {'url': f'/api/tasks/{ctx.task_id}/status', 'headers': ctx.manager, 'json': {'status': status}}
+
+@spec('PUT', '/api/tasks/{task_id}/deadline')
+def _task_deadline(ctx):
+    return {'url': f'/api/tasks/{ctx.task_id}/deadline', 'headers': ctx.manager,
+            'json': {'due_date': '2030-01-01T00:00:00'}}
+
+@spec('DELETE', '/api/tasks/{task_id}')
+def _delete_task(ctx):
+    task = ctx.setup('POST', '/api/tasks/', headers=ctx.manager, json={'title': 'To delete', 'project_id': ctx.project_id})
+    return {'url': f"/api/tasks/{task['id']}", 'headers': ctx.manager}
+
+# ---- comments ----
+@spec('POST', '/api/comments/')
+def _add_comment(ctx):
+    return {'headers': ctx.manager, 'json': {'content': 'Bench comment', 'task_id': ctx.task_id}}
+
+@spec('GET', '/api/comments/task/{task_id}')
+def _list_comments(ctx):
+    return {'url': f'/api/comments/task/{ctx.task_id}', 'headers': ctx.manager}
+
+@spec('DELETE', '/api/comments/{comment_id}')
+def _delete_comment(ctx):
+    comment = ctx.setup('POST', '/api/comments/', headers=ctx.admin, json={'content': 'To delete', 'task_id': ctx.task_id})
+    return {'url': f"/api/comments/{comment['id']}", 'headers': ctx.admin}
+
+# ---- search ----
+@spec('GET', '/api/search')
+def _search(ctx):
+    return {'headers': ctx.developer, 'params': {'q': f'task {next(ctx.seq) % 1000}'}}
+
+# ---- reporting / system ----
+@spec('GET', '/api/reporting/task_counts')
+def _task_counts(ctx):
+    return {'headers': ctx.manager}
+
+@spec('GET', '/api/reporting/project_progress/{project_id}')
+def _report_progress(ctx):
+    return {'url': f'/api/reporting/project_progress/{ctx.project_id}', 'headers': ctx.manager}
+
+@spec('GET', '/api/reporting/overdue_by_project')
+def _overdue_by_project(ctx):
+    return {'headers': ctx.manager}
+
+@spec('GET', '/api/reporting/summary')
+def _summary(ctx):
+    return {'headers': ctx.manager}
+
+@spec('GET', '/api/system/stats')
+def _system_stats(ctx):
+    return {'headers': ctx.admin}
+
+@spec('GET', '/api/system/metrics')
+def _system_metrics(ctx):
+    return {'headers': ctx.admin}
+
+
+class Context:
+    """Tokens and well-known ids shared by the route specs."""
+
+    def __init__(self, client, create_access_token, password):
+        self.client = client
+        self._create_token = create_access_token
+        self.password = password
+        self.seq = itertools.count(1)
+        self.admin = self.fresh_token(1)
+        self.manager = self.fresh_token(2)
+        self.developer = self.fresh_token(3)
+        self.project_id = 7
+        self.task_id = 42
+        page = client.get('/api/projects/', headers=self.developer).json()
+        self.project_cursor = page.get('next_cursor')
+
+    def fresh_token(self, user_id):
+        roles = {1: 'admin', 2: 'manager'}
+        token = self._create_token({'user_id': user_id, 'role': roles.get(user_id, 'developer'), 'n': next(self.seq)})
+        return {'Authorization': f'Bearer {token}'}
+
+    def setup(self, method, url, **kwargs):
+        response = self.client.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def bench_route(ctx, counter, method, path, build, requests, warmup):
+    latencies, statements, errors = [], [], 0
+    for i in range(warmup + requests):
+        request = build(ctx)
+        url = request.pop('url', path)
+        counter[0] = 0
+        started = time.perf_counter()
+        response = ctx.client.request(method, url, **request)
+        elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        statements.append(counter[0])
+        errors += response.status_code >= 400
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'throughput_rps': round(requests / (sum(latencies) / 1000), 1),
+        'statements': statistics.median_low(statements),
+        'max_statements': max(statements),
+    }
+
+
+def compare(results, baseline, threshold):
+    failures = []
+    for route, old in baseline['routes'].items():
+        new = results['routes'].get(route)
+        if new is None:
+            continue
+        if new['p95_ms'] > old['p95_ms'] * (1 + threshold):
+            failures.append(f"{route}: p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+        if new['statements'] > old['statements']:
+            failures.append(f"{route}: statements {old['statements']} -> {new['statements']}")
+        if new['errors'] > old['errors']:
+            failures.append(f"{route}: errors {old['errors']} -> {new['errors']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'pm_bench.db'))
+    parser.add_argument('--reuse', action='store_true', help='skip seeding and use the existing data')
+    parser.add_argument('--projects', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--comments', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=50, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--routes', nargs='*', help='only run routes whose "METHOD path" contains one of these')
+    parser.add_argument('--out', help='write results to this JSON file')
+    parser.add_argument('--save-baseline', help='write results as the new baseline')
+    parser.add_argument('--baseline', help='compare against this baseline and fail on regressions')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative p95 growth')
+    args = parser.parse_args()
+
+    # The app binds its engine to settings.DATABASE_URL at import time
+    os.environ['DATABASE_URL'] = args.url
+    # Change feed streams would otherwise stay open until they time out
+    os.environ['EVENT_STREAM_MAX_SECONDS'] = '0'
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, update
+    from sqlalchemy.orm import Session
+    from app.db import models
+    from app.db.counters import rebuild_task_counters
+    from app.db.database import engine
+    from app.main import app
+    from app.security.jwt import create_access_token
+    from app.security.passwords import password_hasher
+    from scripts.bench_query_plans import seed
+
+    password = 'bench'
+    if not args.reuse:
+        started = time.perf_counter()
+        print(f'Seeding {args.projects} projects, {args.tasks} tasks, {args.comments} comments...')
+        seed(engine, args.projects, args.users, args.tasks, args.comments)
+        with Session(engine) as db:
+            db.execute(update(models.User).where(models.User.id == 1).values(role_id=1))
+            db.execute(update(models.User).where(models.User.id == 2).values(role_id=2))
+            db.execute(update(models.User).values(hashed_password=password_hasher.hash(password)))
+            rebuild_task_counters(db)
+            db.commit()
+        print(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    counter = [0]
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    client = TestClient(app, raise_server_exceptions=False)
+    ctx = Context(client, create_access_token, password)
+
+    # Every route in the public schema must have a spec, so new endpoints cannot skip the suite
+    routes = [
+        (method.upper(), path)
+        for path, operations in app.openapi()['paths'].items()
+        for method in operations
+        if path.startswith('/api/')
+    ]
+    missing = [
+        f'{m} {p}' for m, p in routes
+        if (m, p) not in ROUTE_SPECS and (m, p.rstrip('/')) not in ROUTE_SPECS  # trailing-slash aliases
+    ]
+    if missing:
+        print('No benchmark spec for: ' + ', '.join(missing))
+        sys.exit(2)
+
+    results = {
+        'meta': {
+            'url': args.url,
+            'scale': {'projects': args.projects, 'users': args.users, 'tasks': args.tasks, 'comments': args.comments},
+            'requests_per_route': args.requests,
+            'python': platform.python_version(),
+            'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+        },
+        'routes': {},
+    }
+    print(f"{'route':<48}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'sql':>5}{'err':>5}")
+    for (method, path), build in ROUTE_SPECS.items():
+        name = f'{method} {path}'
+        if args.routes and not any(s in name for s in args.routes):
+            continue
+        row = bench_route(ctx, counter, method, path, build, args.requests, args.warmup)
+        results['routes'][name] = row
+        print(f"{name:<48}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+              f"{row['throughput_rps']:>9.1f}{row['statements']:>5}{row['errors']:>5}")
+
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote {path}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.threshold)
+        for failure in failures:
+            print(f'REGRESSION {failure}')
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
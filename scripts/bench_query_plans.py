@@ -0,0 +1,249 @@
+"""
+Seed a large dataset and check with EXPLAIN that every hot endpoint query is
+served by an index instead of a full table scan or a full sort.
+
+Usage:
+    python -m scripts.bench_query_plans [--url sqlite:///...] [--projects N]
+        [--users N] [--tasks N] [--comments N] [--reuse]
+
+Defaults to a throwaway SQLite file; point --url at a scratch MySQL schema to
+check MySQL plans. Exits non-zero when any query falls back to a scan, or when
+get_project / list_projects issue more statements for a bigger project or page.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi import Response
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.api.pagination import encode_cursor, keyset_page
+from app.api.router.projects import get_project, list_projects
+from app.db import models, schemas
+from app.db.access import accessible_project_ids, project_access_clause
+from app.db.archive import ACTIVE_PROJECT, archived_project_ids
+from app.db.database import Base
+from app.db.search import comment_search, task_search
+from app.security.roles import role_registry
+
+BIG_TABLES = ('tasks', 'comments', 'project_members', 'projects')
+# Queries that sort only their own matches: ranked search results, and the
+# projects one user can reach (bounded by that user's index entries)
+SORT_ALLOWED = ('search tasks', 'search comments', 'user projects (page)')
+# Tables where even a full walk of an index is a failure
+HOT_TABLES = ('tasks', 'comments')
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = 'EXPLAIN QUERY PLAN ' if compiler.dialect.name == 'sqlite' else 'EXPLAIN '
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def seed(engine, n_projects, n_users, n_tasks, n_comments, batch=20000):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rnd = random.Random(42)
+    base = datetime(2024, 1, 1)
+    statuses = list(models.TaskStatus)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Role), [{'name': r.value} for r in models.RoleEnum])
+        conn.execute(insert(models.User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'hashed_password': 'x', 'role_id': 3}
+            for i in range(1, n_users + 1)
+        ])
+        conn.execute(insert(models.Project), [
+            {'title': f'Project {i}', 'created_at': base + timedelta(minutes=i)}
+            for i in range(1, n_projects + 1)
+        ])
+        conn.execute(insert(models.project_members), [
+            {'project_id': p, 'user_id': u}
+            for p in range(1, n_projects + 1)
+            for u in rnd.sample(range(1, n_users + 1), min(5, n_users))
+        ])
+    for start in range(0, n_tasks, batch):
+        with engine.begin() as conn:
+            conn.execute(insert(models.Task), [
+                {
+                    'title': f'Task {i}',
+                    'status': rnd.choice(statuses),
+                    'due_date': base + timedelta(days=rnd.randint(0, 900)),
+                    'created_at': base + timedelta(seconds=i),
+                    'project_id': rnd.randint(1, n_projects),
+                    'assignee_id': rnd.randint(1, n_users),
+                }
+                for i in range(start + 1, min(start + batch, n_tasks) + 1)
+            ])
+    for start in range(0, n_comments, batch):
+        with engine.begin() as conn:
+            conn.execute(insert(models.Comment), [
+                {
+                    'content': f'Comment {i}',
+                    'created_at': base + timedelta(seconds=i),
+                    'task_id': rnd.randint(1, n_tasks),
+                    'author_id': rnd.randint(1, n_users),
+                }
+                for i in range(start + 1, min(start + batch, n_comments) + 1)
+            ])
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE' if engine.dialect.name == 'sqlite' else 'ANALYZE TABLE tasks, comments, project_members, projects')
+
+
+def endpoint_queries(db: Session):
+    """(name, statement) pairs mirroring the queries the routers issue."""
+    now = datetime(2025, 6, 1)
+    cursor = encode_cursor(datetime(2024, 1, 2), 100)
+    Task, Project, Comment = models.Task, models.Project, models.Comment
+    pm = models.project_members
+    dialect = db.get_bind().dialect.name
+    active_tasks = select(Task).join(Project, Project.id == Task.project_id).where(ACTIVE_PROJECT)
+    return [
+        ('list_tasks (all, page 2)', keyset_page(active_tasks, Task, cursor, 50)),
+        ('list_tasks (project, page 2)', keyset_page(active_tasks.where(Task.project_id == 7), Task, cursor, 50)),
+        ('list_tasks (developer)', keyset_page(active_tasks.where(Task.assignee_id == 5), Task, None, 50)),
+        ('list_projects (page 2)', keyset_page(select(Project).where(ACTIVE_PROJECT), Project, cursor, 50)),
+        ('project members (selectin)', select(pm.c.project_id, pm.c.user_id).where(pm.c.project_id.in_([1, 2, 3]))),
+        ('project tasks (selectin)', select(Task).where(Task.project_id.in_([7]))),
+        ('get_project access check', select(project_access_clause(7, 5))),
+        ('user projects (page)', keyset_page(
+            select(Project).where(Project.id.in_(accessible_project_ids(5)), ACTIVE_PROJECT), Project, None, 50)),
+        ('overdue tasks', select(Task).where(
+            Task.due_date < now, Task.status != models.TaskStatus.done, Task.project_id.not_in(archived_project_ids()))),
+        ('overdue by project', select(Project.id, Project.title, func.count(Task.id))
+            .join(Task, Task.project_id == Project.id)
+            .where(Task.due_date < now, Task.status != models.TaskStatus.done, Task.project_id.not_in(archived_project_ids()))
+            .group_by(Project.id)),
+        ('comment thread state (etag)', select(Task.id, func.count(Comment.id), func.max(Comment.id))
+            .outerjoin(Comment, Comment.task_id == Task.id).where(Task.id == 42).group_by(Task.id)),
+        ('list_comments (since)', keyset_page(select(Comment).where(Comment.task_id == 42), Comment, cursor, 50)),
+        ('search tasks', task_search(dialect, ['task', '12345'])),
+        ('search comments', comment_search(dialect, ['comment', '54321'], developer_id=5)),
+        ('archived project tasks (restore)', select(models.ArchivedTask.id)
+            .where(models.ArchivedTask.project_id == 7).order_by(models.ArchivedTask.id).limit(500)),
+        ('task counters rebuild', select(Task.project_id, Task.status, func.count(Task.id))
+            .where(Task.project_id.in_([1, 2, 3])).group_by(Task.project_id, Task.status)),
+    ]
+
+
+def _count_statements(engine, call) -> int:
+    """Statements issued by `call(db)` on a fresh session, response serialization included."""
+    count = 0
+
+    def _count(*args):
+        nonlocal count
+        count += 1
+
+    with Session(engine) as db:
+        event.listen(engine, 'before_cursor_execute', _count)
+        try:
+            call(db)
+        finally:
+            event.remove(engine, 'before_cursor_execute', _count)
+    return count
+
+
+def statement_count_checks(engine) -> list:
+    """
+    (name, small, large) statement counts for the project endpoints on the
+    smallest vs the largest project and on a 1-row vs a full page. Eager
+    loading keeps them equal however many projects, members and tasks exist.
+    """
+    with Session(engine) as db:
+        role_registry.load(db)
+        admin_role = db.query(models.Role.id).filter(models.Role.name == models.RoleEnum.admin.value).scalar()
+        sizes = (
+            db.query(models.Task.project_id, func.count(models.Task.id))
+            .group_by(models.Task.project_id).order_by(func.count(models.Task.id)).all()
+        )
+    admin = models.User(id=0, role_id=admin_role)
+    smallest, largest = sizes[0][0], sizes[-1][0]
+
+    def detail(project_id):
+        return lambda db: schemas.ProjectDetail.model_validate(
+            get_project(project_id, Response(), None, db, admin)).model_dump()
+
+    def page(limit):
+        return lambda db: schemas.ProjectPage.model_validate(
+            list_projects(None, limit, False, db, admin)).model_dump()
+
+    return [
+        ('get_project', _count_statements(engine, detail(smallest)), _count_statements(engine, detail(largest))),
+        ('list_projects', _count_statements(engine, page(1)), _count_statements(engine, page(100))),
+    ]
+
+
+def plan_problems(dialect: str, rows, allow_sort: bool = False) -> list:
+    problems = []
+    if dialect == 'sqlite':
+        for row in rows:
+            detail = row[-1]
+            words = detail.split()
+            if words[:1] == ['SCAN'] and len(words) > 1 and words[1] in BIG_TABLES:
+                if 'INDEX' not in detail or words[1] in HOT_TABLES:
+                    problems.append(detail)
+            if 'TEMP B-TREE FOR ORDER BY' in detail and not allow_sort:
+                problems.append(detail)
+    else:
+        for row in rows:
+            row = row._mapping
+            table, access, extra = row.get('table'), row.get('type'), row.get('Extra') or ''
+            if table in BIG_TABLES and access == 'ALL':
+                problems.append(f'full scan of {table}')
+            elif table in HOT_TABLES and access == 'index':
+                problems.append(f'full index scan of {table}')
+            if 'filesort' in extra and not allow_sort:
+                problems.append(f'{table}: {extra}')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'pm_query_plans.db'))
+    parser.add_argument('--projects', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--tasks', type=int, default=200000)
+    parser.add_argument('--comments', type=int, default=400000)
+    parser.add_argument('--reuse', action='store_true', help='skip seeding and use the existing data')
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if not args.reuse:
+        started = time.perf_counter()
+        print(f'Seeding {args.projects} projects, {args.tasks} tasks, {args.comments} comments...')
+        seed(engine, args.projects, args.users, args.tasks, args.comments)
+        print(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    failures = 0
+    with Session(engine) as db:
+        for name, stmt in endpoint_queries(db):
+            rows = db.execute(Explain(stmt)).all()
+            started = time.perf_counter()
+            db.execute(stmt).all()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            problems = plan_problems(engine.dialect.name, rows, allow_sort=name in SORT_ALLOWED)
+            failures += bool(problems)
+            print(f"{'FAIL' if problems else 'ok  '} {name:<32} {elapsed_ms:8.2f} ms")
+            for problem in problems:
+                print(f'       {problem}')
+    for name, small, large in statement_count_checks(engine):
+        failures += small != large
+        print(f"{'FAIL' if small != large else 'ok  '} {name + ' statements':<32} {small} small, {large} large")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare ways of turning a list of Task rows into a JSON response body.
+
+Usage:
+    python -m scripts.bench_serialization [--rows N] [--repeat N]
+
+  jsonable_encoder   what endpoints without a response_model used to do
+  validate + dumps   response_model validation, then a Python dict and json.dumps
+  validate + orjson  same, rendered with orjson (only when orjson is installed)
+  adapter dump_json  prebuilt TypeAdapter straight to bytes; FastAPI's path for
+                     endpoints with a response_model and the default response class
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.db import models, schemas
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+task_list = TypeAdapter(List[schemas.TaskOut])
+
+
+def make_tasks(n):
+    base = datetime(2024, 1, 1)
+    statuses = list(models.TaskStatus)
+    return [
+        models.Task(
+            id=i, title=f'Task {i}', description='Lorem ipsum dolor sit amet' if i % 2 else None,
+            status=statuses[i % 3], due_date=base + timedelta(days=i % 400),
+            created_at=base + timedelta(seconds=i), project_id=i % 50 + 1, assignee_id=i % 20 or None,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.rows)
+    candidates = [
+        ('jsonable_encoder', lambda: json.dumps(jsonable_encoder(tasks)).encode()),
+        ('validate + dumps', lambda: json.dumps(task_list.dump_python(task_list.validate_python(tasks), mode='json')).encode()),
+    ]
+    if orjson is not None:
+        candidates.append(('validate + orjson', lambda: orjson.dumps(task_list.dump_python(task_list.validate_python(tasks)))))
+    candidates.append(('adapter dump_json', lambda: task_list.dump_json(task_list.validate_python(tasks))))
+
+    print(f'{args.rows} TaskOut rows, best of {args.repeat}')
+    baseline = None
+    for name, fn in candidates:
+        elapsed_ms, size = best_of(fn, args.repeat)
+        baseline = baseline or elapsed_ms
+        print(f'{name:<20}{elapsed_ms:10.1f} ms{size / 1024:10.0f} KiB{baseline / elapsed_ms:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
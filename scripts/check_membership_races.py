@@ -0,0 +1,140 @@
+"""
+Run concurrent membership edits of one project in two sessions and check that
+neither loses the other's change nor fails on the unique membership index.
+
+Usage:
+    python -m scripts.check_membership_races [--url sqlite:///...]
+
+Defaults to a throwaway SQLite file. Point --url at a scratch MySQL schema to
+check REPEATABLE READ, where each transaction's first read fixes its snapshot.
+Exits non-zero when a scenario ends with the wrong membership or an error.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.database import Base
+from app.db.membership import change_members, lock_project
+
+MEMBER = 7
+
+
+def seed(engine, member: bool) -> int:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(models.Role), [{'name': r.value} for r in models.RoleEnum])
+        db.execute(insert(models.User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'hashed_password': 'x', 'role_id': 3}
+            for i in range(1, MEMBER + 1)
+        ])
+        project = models.Project(title='Race')
+        db.add(project)
+        db.flush()
+        if member:
+            db.execute(insert(models.project_members), [{'project_id': project.id, 'user_id': MEMBER}])
+        db.commit()
+        return project.id
+
+
+def _begin(db: Session, project_id: int):
+    # What update_project_members reads before it takes the lock; on MySQL this fixes the snapshot
+    return db.query(models.Project.version).filter(models.Project.id == project_id).scalar()
+
+
+def _patch(db: Session, project_id: int, add=(), remove=()):
+    lock_project(db, project_id)
+    return change_members(db, project_id, add=add, remove=remove)
+
+
+def _members(engine, project_id: int) -> set:
+    with Session(engine) as db:
+        pm = models.project_members
+        return set(db.scalars(select(pm.c.user_id).where(pm.c.project_id == project_id)))
+
+
+def add_after_concurrent_remove(engine) -> list:
+    """A's snapshot predates B's committed removal; A's add must still happen."""
+    project_id = seed(engine, member=True)
+    with Session(engine) as a, Session(engine) as b:
+        _begin(a, project_id)
+        _begin(b, project_id)
+        _patch(b, project_id, remove=[MEMBER])
+        b.commit()
+        added, _ = _patch(a, project_id, add=[MEMBER])
+        a.commit()
+    problems = []
+    if added != [MEMBER]:
+        problems.append(f'add reported {added}, expected [{MEMBER}]')
+    if MEMBER not in _members(engine, project_id):
+        problems.append('member missing after add')
+    return problems
+
+
+def two_concurrent_adds(engine) -> list:
+    """Both add the same id while one waits on the other's lock; exactly one reports it."""
+    project_id = seed(engine, member=False)
+    results, errors = {}, []
+    locked = threading.Event()
+
+    def second():
+        try:
+            with Session(engine) as b:
+                _begin(b, project_id)
+                locked.wait()
+                results['b'] = _patch(b, project_id, add=[MEMBER])[0]
+                b.commit()
+        except Exception as exc:
+            errors.append(f'second add failed: {exc.__class__.__name__}: {exc}')
+
+    with Session(engine) as a:
+        _begin(a, project_id)
+        thread = threading.Thread(target=second)
+        thread.start()
+        # Let the second session read its snapshot before the first one writes
+        time.sleep(0.2)
+        results['a'] = _patch(a, project_id, add=[MEMBER])[0]
+        locked.set()
+        # The second session now waits on the project row lock
+        time.sleep(0.2)
+        a.commit()
+    thread.join()
+    if errors:
+        return errors
+    reported = sorted(results.values())
+    if reported != [[], [MEMBER]]:
+        return [f'adds reported {reported}, expected one [{MEMBER}] and one []']
+    return []
+
+
+SCENARIOS = [
+    ('add after concurrent remove', add_after_concurrent_remove),
+    ('two concurrent adds', two_concurrent_adds),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'pm_membership_races.db'))
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    failures = 0
+    for name, scenario in SCENARIOS:
+        problems = scenario(engine)
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok  '} {name}")
+        for problem in problems:
+            print(f'       {problem}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Check that task counter maintenance stays exact, including for projects that
+predate the counters table and so have no counter rows yet.
+
+Usage:
+    python -m scripts.check_task_counters [--url sqlite:///...]
+
+Defaults to a throwaway in-memory SQLite database. Exits non-zero when any
+scenario leaves counters that differ from a real count.
+"""
+import argparse
+import sys
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.counters import (
+    adjust_task_counter, init_task_counters, move_task_counter, project_task_total, rebuild_task_counters,
+    verify_task_counters,
+)
+from app.db.database import Base
+from app.db.deletion import delete_task_batch
+
+TaskStatus = models.TaskStatus
+
+
+def seed_project(db: Session, title: str, statuses, with_counters: bool) -> int:
+    project = models.Project(title=title)
+    db.add(project)
+    db.flush()
+    db.execute(insert(models.Task), [
+        {'title': f'{title} task {i}', 'status': status, 'project_id': project.id}
+        for i, status in enumerate(statuses)
+    ])
+    if with_counters:
+        db.flush()
+        init_task_counters(db, project.id)
+        db.flush()
+        rebuild_task_counters(db, [project.id])
+    db.commit()
+    return project.id
+
+
+def _move_first(db: Session, project_id: int, old_status, new_status):
+    task = db.query(models.Task).filter(models.Task.project_id == project_id, models.Task.status == old_status).first()
+    task.status = new_status
+    db.flush()
+    move_task_counter(db, project_id, old_status, new_status)
+
+
+def _add_task(db: Session, project_id: int, status):
+    db.add(models.Task(title='added', status=status, project_id=project_id))
+    db.flush()
+    adjust_task_counter(db, project_id, status, 1)
+
+
+def _delete_first(db: Session, project_id: int, status):
+    task = db.query(models.Task).filter(models.Task.project_id == project_id, models.Task.status == status).first()
+    db.delete(task)
+    db.flush()
+    adjust_task_counter(db, project_id, status, -1)
+
+
+def _delete_batch(db: Session, project_id: int):
+    if project_task_total(db, project_id) != db.query(models.Task).filter(models.Task.project_id == project_id).count():
+        raise AssertionError('project_task_total differs from a real count')
+    # Mixed statuses in one batch: several counters change at once
+    delete_task_batch(db, project_id, 3)
+
+
+SCENARIOS = [
+    ('status change', lambda db, pid: _move_first(db, pid, TaskStatus.todo, TaskStatus.done)),
+    ('two status changes', lambda db, pid: (_move_first(db, pid, TaskStatus.todo, TaskStatus.in_progress),
+                                            _move_first(db, pid, TaskStatus.in_progress, TaskStatus.done))),
+    ('task created', lambda db, pid: _add_task(db, pid, TaskStatus.todo)),
+    ('task deleted', lambda db, pid: _delete_first(db, pid, TaskStatus.todo)),
+    ('background delete batch', _delete_batch),
+]
+
+
+def run_scenarios(engine) -> int:
+    failures = 0
+    for name, action in SCENARIOS:
+        for with_counters in (True, False):
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+            with Session(engine) as db:
+                statuses = [TaskStatus.todo, TaskStatus.todo, TaskStatus.in_progress, TaskStatus.done, TaskStatus.done]
+                project_id = seed_project(db, 'Check', statuses, with_counters)
+                action(db, project_id)
+                db.commit()
+                drift = verify_task_counters(db)
+            label = f"{name} ({'with' if with_counters else 'without'} counter rows)"
+            failures += bool(drift)
+            print(f"{'FAIL' if drift else 'ok  '} {label}")
+            for project, status, stored, actual in drift:
+                print(f'       project {project} {status}: counter={stored} actual={actual}')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='sqlite://')
+    args = parser.parse_args()
+    failures = run_scenarios(create_engine(args.url))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+from sqlalchemy import inspect, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+from app.db.database import engine, Base
+from app.db import models
+
+# Brings an existing database up to date with app.db.models without dropping
+# anything: creates missing tables, then columns and indexes added to existing
+# tables, and (on SQLite) the full-text search tables and their triggers.
+# Also backfills is_archived on old project rows.
+# New columns must be nullable or carry a server_default.
+# Safe to re-run. Usage: python -m scripts.migrate_db
+
+print('Creating missing tables...')
+Base.metadata.create_all(bind=engine)
+
+inspector = inspect(engine)
+for table in Base.metadata.sorted_tables:
+    existing = {col['name'] for col in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        print(f'Adding column {column.name} to {table.name}...')
+        default = column.server_default.arg if column.server_default is not None else None
+        with engine.begin() as conn:
+            if engine.dialect.name == 'sqlite' and default is not None and not isinstance(default, str):
+                # SQLite rejects non-constant defaults (CURRENT_TIMESTAMP) on ADD COLUMN:
+                # add the bare column, then backfill existing rows with the default
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                value = default.compile(dialect=engine.dialect)
+                conn.execute(text(f'UPDATE {table.name} SET {column.name} = {value}'))
+            else:
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+
+inspector = inspect(engine)
+for table in Base.metadata.sorted_tables:
+    existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        # FULLTEXT indexes only exist on MySQL; SQLite gets the FTS5 tables below
+        if index.kwargs.get('mysql_prefix') == 'FULLTEXT' and engine.dialect.name != 'mysql':
+            continue
+        print(f'Creating index {index.name} on {table.name}...')
+        try:
+            index.create(bind=engine)
+        except IntegrityError as exc:
+            # e.g. duplicate project_members rows blocking a unique index
+            print(f'  skipped, clean up the offending rows and re-run: {exc.orig}')
+
+# Rows from before the server default: default listings only show is_archived = false
+with engine.begin() as conn:
+    conn.execute(update(models.Project).where(models.Project.is_archived.is_(None)).values(is_archived=False))
+
+if engine.dialect.name == 'sqlite':
+    # Without AUTOINCREMENT SQLite may reuse the ids of archived tasks and
+    # comments, and restoring them would then fail; only a table rebuild adds it
+    with engine.connect() as conn:
+        for table_name in ('tasks', 'comments'):
+            ddl = conn.exec_driver_sql(f"SELECT sql FROM sqlite_master WHERE name = '{table_name}'").scalar() or ''
+            if 'AUTOINCREMENT' not in ddl.upper():
+                print(f'Warning: {table_name} was created without AUTOINCREMENT; rebuild it before archiving projects')
+
+    for table_name, statements in models.SQLITE_FTS_DDL.items():
+        fts_table = f'{table_name}_fts'
+        if fts_table in inspector.get_table_names():
+            continue
+        print(f'Creating search index {fts_table}...')
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+            # Index the rows that predate the triggers
+            conn.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+print('Done')
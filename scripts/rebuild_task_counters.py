@@ -0,0 +1,19 @@
+import sys
+from app.db.database import SessionLocal
+from app.db.counters import rebuild_task_counters, verify_task_counters
+
+# Usage: python -m scripts.rebuild_task_counters [--verify]
+db = SessionLocal()
+try:
+    if '--verify' in sys.argv:
+        drift = verify_task_counters(db)
+        for project_id, status, stored, actual in drift:
+            print(f'project {project_id} {status}: counter={stored} actual={actual}')
+        print('Counters OK' if not drift else f'{len(drift)} counters drifted')
+        sys.exit(1 if drift else 0)
+    print('Rebuilding task counters...')
+    rebuild_task_counters(db)
+    db.commit()
+    print('Done')
+finally:
+    db.close()